@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# Compare drawing error ellipses one matplotlib.patches.Ellipse at a time,
+# as gvarplot used to, against gvarplot's single EllipseCollection.
+#
+#   python benchmark/ellipses.py [N ...]
+#
+# Each measurement runs in a fresh interpreter so that the peak resident set size
+# belongs to that rendering path alone.
+
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SIGMA = [1, 2, 3]
+
+def data(N, seed=7):
+    import gvar as gv
+
+    rng = np.random.default_rng(seed=seed)
+    mean = rng.normal(size=(N, 2))
+    dx, dy = rng.uniform(0.05, 0.2, size=(2, N))
+    corr = rng.uniform(-1, 1, size=N)
+    cov = np.zeros((N, 2, 2))
+    cov[:, 0, 0] = dx**2
+    cov[:, 1, 1] = dy**2
+    cov[:, 0, 1] = cov[:, 1, 0] = corr*dx*dy
+    xy = np.array([gv.gvar(m, c) for m, c in zip(mean, cov)])
+    return xy[:, 0], xy[:, 1]
+
+def patches(ax, x, y, sigma):
+    import gvar as gv
+    import matplotlib.patches
+
+    for a, b in zip(x, y):
+        C = gv.evalcov((a, b))
+        w, v = np.linalg.eigh(C)
+        w = np.sort(w)[::-1]
+        if C[0,1] == 0:
+            angle = 0 if C[0,0] >= C[1,1] else np.pi/2
+        else:
+            angle = np.arctan2(w[0]-C[0,0], C[0,1])
+        for s in sigma:
+            ax.add_patch(matplotlib.patches.Ellipse(
+                [a.mean, b.mean], *(2*s*np.sqrt(w)), angle=angle*180/np.pi, alpha=0.2))
+
+def collections(ax, x, y, sigma):
+    import gvarplot
+
+    gvarplot.ellipses(ax, x, y, sigma=sigma)
+
+def run(path, N):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    x, y = data(N)
+    fig, ax = plt.subplots()
+
+    start = time.perf_counter()
+    globals()[path](ax, x, y, SIGMA)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fig.canvas.draw()
+    draw = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux (but bytes on macOS).
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{build} {draw} {rss}")
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2], int(sys.argv[3]))
+        exit()
+
+    sizes = [int(n) for n in sys.argv[1:]] or [100, 1000, 10000]
+    print(f"{'N':>8} {'path':>12} {'build [s]':>10} {'draw [s]':>10} {'peak RSS':>10}")
+    for N in sizes:
+        for path in ['patches', 'collections']:
+            result = subprocess.run([sys.executable, __file__, '--run', path, str(N)],
+                    capture_output=True, text=True, check=True)
+            build, draw, rss = result.stdout.split()
+            print(f"{N:>8} {path:>12} {float(build):>10.3f} {float(draw):>10.3f} {int(rss):>10}")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+# Check the band gvarplot.fit draws, from central differences on the parameters' means,
+# against the standard deviation of the fit function evaluated on the gvars, and time both.
+#
+#   python benchmark/fit.py [POINTS]
+#
+# The parameters are a plain prior and one with a log-normal parameter, whose fit function reads p['E']
+# from the BufferDict's 'log(E)'.  The script exits with an error if any relative difference exceeds 1e-6.
+
+import sys
+import time
+import types
+
+import gvar as gv
+import numpy as np
+
+from gvarplot import geometry
+
+def fcn(x, p):
+    return p['a'] * np.exp(-p['E']*x) + p['b']
+
+PRIORS = {
+    'plain':    {'a': '1(2)', 'E': '1.0(5)', 'b': '0.1(1)'},
+    'log':      {'a': '1(2)', 'log(E)': gv.log(gv.gvar('1.0(5)')), 'b': '0.1(1)'},
+}
+
+def check(name, prior, x):
+    # Only fcn, p, x and y are needed, so the prior stands in for the fit's parameters.
+    p = gv.BufferDict(gv.gvar(prior))
+    result = types.SimpleNamespace(fcn=fcn, p=p, x=x[:5], y=fcn(x[:5], p))
+
+    start = time.perf_counter()
+    band = geometry.fit(result, x)
+    differences = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact = gv.sdev(fcn(x, p))
+    gvars = time.perf_counter() - start
+
+    error = np.max(np.abs(band['sdev'] - exact) / exact)
+    print(f"{name:>10} {differences:>14.3f} {gvars:>10.3f} {error:>16.2e}")
+    return error <= 1e-6
+
+if __name__ == '__main__':
+    N = int(sys.argv[1]) if sys.argv[1:] else 100000
+    x = np.linspace(0, 5, N)
+
+    print(f"{'prior':>10} {'fit band [s]':>14} {'gvars [s]':>10} {'relative error':>16}")
+    good = all([check(name, prior, x) for name, prior in PRIORS.items()])
+    if not good:
+        sys.exit("The fit band disagrees with the gvars.")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+# Measure what `import gvarplot` costs a fresh interpreter,
+# and what using each plotter for the first time adds to that.
+#
+#   python benchmark/imports.py [repeats]
+#
+# Each statement is timed in its own interpreter, and the best of the repeats is reported,
+# along with whether the heavy optional dependencies ended up imported.
+
+import subprocess
+import sys
+
+HEAVY = ['pandas', 'matplotlib.pyplot']
+
+STATEMENTS = [
+    'import gvar',
+    'import gvarplot',
+    'import gvarplot; gvarplot.mean',
+    'import gvarplot; gvarplot.errorbar',
+    'import gvarplot; gvarplot.errorband',
+    'import gvarplot; gvarplot.ellipses',
+    'import gvarplot; gvarplot.vspan',
+    'import gvarplot; gvarplot.uncertainty_matrix',
+]
+
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, *(m for m in {heavy!r} if m in sys.modules))
+'''
+
+def measure(statement, repeats):
+    best, loaded = float('inf'), []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY)],
+                capture_output=True, text=True, check=True)
+        elapsed, *loaded = result.stdout.split()
+        best = min(best, float(elapsed))
+    return best, loaded
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if sys.argv[1:] else 5
+
+    print(f"{'statement':<48} {'time [s]':>9}  heavy modules imported")
+    for statement in STATEMENTS:
+        elapsed, loaded = measure(statement, repeats)
+        print(f"{statement:<48} {elapsed:>9.3f}  {' '.join(loaded) or '-'}")
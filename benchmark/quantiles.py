@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+# Check gvarplot's streaming Quantiles against np.quantile of all the observations at once,
+# on normal and on skewed (lognormal) observations, and time both.
+#
+#   python benchmark/quantiles.py [ELEMENTS [SAMPLES [BATCH]]]
+#
+# The error is reported as a rank: how many observations lie between the estimate and the exact quantile.
+# The script exits with an error if the exact regime, with fewer observations than the summary holds,
+# does not match np.quantile, or if any rank error exceeds 0.2% of the observations.
+
+import math
+import sys
+import time
+
+import numpy as np
+
+from gvarplot.quantile import Quantiles
+
+PROBABILITIES = [(1 + math.erf(s / math.sqrt(2))) / 2 for s in (-3, -2, -1, 1, 2, 3)]
+
+def rank_error(observations, estimates):
+    # Per probability, the largest over the elements of how far the estimate's rank is from the exact quantile's.
+    ranks = np.array([(observations < e[:, np.newaxis]).sum(axis=1) for e in estimates])
+    exact = np.array(PROBABILITIES)[:, np.newaxis] * (observations.shape[1] - 1)
+    return np.abs(ranks - exact).max(axis=1)
+
+def check(name, observations, batch):
+    start = time.perf_counter()
+    quantiles = Quantiles(PROBABILITIES, observations.shape[:1])
+    for first in range(0, observations.shape[1], batch):
+        quantiles.add(observations[:, first:first+batch])
+    estimates = quantiles.estimates
+    streamed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    np.quantile(observations, PROBABILITIES, axis=1)
+    exact = time.perf_counter() - start
+
+    errors = rank_error(observations, estimates)
+    print(f"{name:>10} {streamed:>12.3f} {exact:>14.3f} " + ' '.join(f"{e:>6.1f}" for e in errors))
+    return errors.max() <= 0.002 * observations.shape[1]
+
+if __name__ == '__main__':
+    elements, samples, batch = ([int(a) for a in sys.argv[1:]] + [1000, 10000, 1000][len(sys.argv[1:]):])[:3]
+    rng = np.random.default_rng(seed=7)
+
+    # With no more observations than the summary holds, the estimates are exact.
+    few = rng.normal(size=(10, 500))
+    quantiles = Quantiles(PROBABILITIES, (10,))
+    quantiles.add(few[:, :200])
+    quantiles.add(few[:, 200:])
+    exact = np.allclose(quantiles.estimates, np.quantile(few, PROBABILITIES, axis=1), rtol=0, atol=1e-12)
+    print(f"exact for {few.shape[1]} observations: {exact}")
+
+    normal = rng.normal(size=(elements, samples))
+    print(f"{'':>10} {'stream [s]':>12} {'np.quantile [s]':>14} rank error at " + ' '.join(f"{s:>+4d}σ" for s in (-3, -2, -1, 1, 2, 3)))
+    good = check('normal', normal, batch)
+    good = check('lognormal', np.exp(normal), batch) and good
+
+    if not (exact and good):
+        sys.exit("Quantiles disagrees with np.quantile.")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+# Time every gvarplot entry point at a range of sizes.
+#
+#   python benchmark/suite.py [--max-size N] [name ...]
+#
+# For each case and size a fresh interpreter, using the Agg backend,
+#   makes the data (not timed),
+#   calls the plotter (compute),
+#   draws the canvas (draw),
+#   and saves a PNG to memory (savefig),
+# and reports those times along with its resident set size after making the data and at its peak.
+# Names select cases by prefix, so `errorband` runs both errorband cases.
+
+import argparse
+import io
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+def points(N, seed=7):
+    # Correlated x and y, with some correlation along the whole curve through a few shared gvars.
+    import gvar as gv
+
+    rng = np.random.default_rng(seed=seed)
+    t = np.linspace(0, 2*np.pi, N)
+    common = gv.gvar(['1.00(5)', '0.0(1)'])
+    x = gv.gvar(t, rng.uniform(0.01, 0.05, size=N)) + common[1]
+    y = common[0]*np.cos(x) + gv.gvar(np.zeros(N), rng.uniform(0.01, 0.05, size=N))
+    return t, x, y
+
+def parameters(N, seed=7):
+    import gvar as gv
+
+    rng = np.random.default_rng(seed=seed)
+    A = rng.normal(size=(N, N))
+    return gv.gvar(rng.normal(size=N), A @ A.T / N + 0.1*np.eye(N))
+
+def ellipse(N):
+    _, x, y = points(N)
+    def plot(ax):
+        import gvarplot
+        for a, b in zip(x, y):
+            gvarplot.ellipse(ax, a, b, sigma=[1,2,3])
+    return plot
+
+def ellipses(N):
+    _, x, y = points(N)
+    def plot(ax):
+        import gvarplot
+        gvarplot.ellipses(ax, x, y, sigma=[1,2,3])
+    return plot
+
+def errorbar(N):
+    _, x, y = points(N)
+    def plot(ax):
+        import gvarplot
+        gvarplot.errorbar(ax, x, y)
+    return plot
+
+def errorband_numbers(N):
+    t, _, y = points(N)
+    def plot(ax):
+        import gvarplot
+        gvarplot.errorband(ax, t, y)
+    return plot
+
+def errorband_gvars(N):
+    _, x, y = points(N)
+    def plot(ax):
+        import gvarplot
+        gvarplot.errorband(ax, x, y)
+    return plot
+
+def mean(N):
+    _, x, y = points(N)
+    def plot(ax):
+        import gvarplot
+        gvarplot.mean(ax, x, y)
+    return plot
+
+def spans(N):
+    g = parameters(N)
+    def plot(ax):
+        import gvarplot
+        gvarplot.vspan(ax, g, sigma=[1,2,3])
+        gvarplot.hspan(ax, g, sigma=[1,2,3])
+    return plot
+
+def uncertainty_matrix(N):
+    g = parameters(N)
+    def plot(ax):
+        import gvarplot
+        # uncertainty_matrix makes its own figure; time that one.
+        return gvarplot.uncertainty_matrix(g)[0]
+    return plot
+
+# Each case and the sizes it is run at: numbers of points, calls or parameters.
+CASES = {
+    'ellipse':              [10, 100, 1000],
+    'ellipses':             [10, 1000, 100000, 1000000],
+    'errorbar':             [10, 1000, 100000, 1000000],
+    'errorband_numbers':    [10, 1000, 100000, 1000000],
+    'errorband_gvars':      [10, 1000, 100000, 1000000],
+    'mean':                 [10, 1000, 100000, 1000000],
+    'spans':                [2, 20, 200, 2000],
+    'uncertainty_matrix':   [2, 5, 10, 20, 200],
+}
+
+def run(case, N):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plot = globals()[case](N)
+    setup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    fig, ax = plt.subplots()
+    start = time.perf_counter()
+    fig = plot(ax) or fig
+    compute = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fig.canvas.draw()
+    draw = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fig.savefig(io.BytesIO(), format='png')
+    savefig = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux (but bytes on macOS).
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(compute, draw, savefig, setup_rss, peak_rss)
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--run']:
+        run(sys.argv[2], int(sys.argv[3]))
+        exit()
+
+    parser = argparse.ArgumentParser(description='Time every gvarplot entry point at a range of sizes.')
+    parser.add_argument('--max-size', type=int, default=None, help='skip sizes larger than this')
+    parser.add_argument('names', nargs='*', help='only run cases whose names start with these')
+    args = parser.parse_args()
+
+    print(f"{'case':<20} {'N':>8} {'compute [s]':>12} {'draw [s]':>10} {'savefig [s]':>12} {'setup RSS':>10} {'peak RSS':>10}")
+    for case, sizes in CASES.items():
+        if args.names and not any(case.startswith(name) for name in args.names):
+            continue
+        for N in sizes:
+            if args.max_size and N > args.max_size:
+                continue
+            result = subprocess.run([sys.executable, __file__, '--run', case, str(N)],
+                    capture_output=True, text=True)
+            if result.returncode:
+                print(f"{case:<20} {N:>8} failed: {result.stderr.strip().splitlines()[-1]}")
+                continue
+            compute, draw, savefig, setup_rss, peak_rss = result.stdout.split()
+            print(f"{case:<20} {N:>8} {float(compute):>12.3f} {float(draw):>10.3f} {float(savefig):>12.3f} {int(setup_rss):>10} {int(peak_rss):>10}", flush=True)
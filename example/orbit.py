@@ -191,7 +191,9 @@ gvarplot.ellipses(ax, fit.p['X'], fit.p['Y'], color='blue', label='Observations
 # We can visualize the best-fit ellipse by plotting the mean,
 gvarplot.mean(ax, *bf, color='darkgreen', label='Best fit')
 # But, we want to know the uncertainty.
-gvarplot.errorband(ax, *bf, sigma=[1,2], alpha=1/160, color='green', zorder=-1)
+# Given the function itself and the range of theta, errorband only evaluates it
+# where the band bends, rather than on the whole fine grid of thetas.
+gvarplot.errorband(ax, (-np.pi, np.pi), best_fit, sigma=[1,2], alpha=1/160, color='green', zorder=-1)
 # You might have to fiddle with the alpha ^
 # to prevent it from being too dark.
 
@@ -1,7 +1,51 @@
-from .span import vspan, hspan
-from .ellipses import ellipse, ellipses
-from .errorbar import errorbar
-from .errorband import errorband
-from .mean import mean
-from .uncertainty_matrix import uncertainty_matrix
+import importlib
+import sys
+import types
 
+# The plotting functions, and the modules they live in.
+# A module is only imported when one of its functions is first used,
+# so that `import gvarplot` does not pay for matplotlib or pandas.
+_exports = {
+        'vspan':                'span',
+        'hspan':                'span',
+        'ellipse':              'ellipses',
+        'ellipses':             'ellipses',
+        'ellipses_from_cov':    'ellipses',
+        'errorbar':             'errorbar',
+        'errorband':            'errorband',
+        'LiveErrorband':        'errorband',
+        'sampled_errorband':    'sampled',
+        'sampled_ellipses':     'sampled',
+        'mean':                 'mean',
+        'means':                'series',
+        'errorbars':            'series',
+        'uncertainty_matrix':   'uncertainty_matrix',
+        'fit':                  'fit',
+        'render':               'render',
+        'Cache':                'cache',
+        'Gaussians':            'gaussians',
+        'Profile':              'profile',
+        }
+
+__all__ = list(_exports)
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f'.{_exports[name]}', __name__)
+    globals()[name] = getattr(module, name)
+    return globals()[name]
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
+
+class _Package(types.ModuleType):
+    # Importing a submodule binds it as an attribute of the package,
+    # which would shadow the function of the same name (gvarplot.ellipses, for example).
+    # Bind the function instead, as the eager `from .ellipses import ellipses` used to.
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and _exports.get(name) == name:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,5 @@
+import sys
+
+from gvarplot.cli import main
+
+sys.exit(main())
@@ -0,0 +1,80 @@
+import collections.abc
+import functools
+import sys
+
+import numpy as np
+import gvar as gv
+
+from gvarplot.cache import cached
+from gvarplot.gaussians import Gaussians
+
+class Values:
+    """ The means and standard deviations of something to plot.
+
+    Args:
+        x:  An array of gvars or numbers, a dictionary or BufferDict of them,
+            a pandas Series or DataFrame, `Gaussians`, or a single gvar or number.
+
+    The input is converted to an array once, and its means and standard deviations
+    are only extracted when first needed and are then kept,
+    so that a plotter which needs them several times pays for the conversion only once.
+    """
+
+    def __init__(self, x):
+        # Nothing can be a pandas object unless the caller has already imported pandas.
+        pd = sys.modules.get('pandas')
+
+        if isinstance(x, Gaussians):
+            # Kept as they are, so that only what is needed is read from their arrays.
+            self.data = x
+            self.is_gvar = x.size > 0
+            return
+
+        if isinstance(x, gv.BufferDict):
+            x = x.buf
+        elif pd is not None and isinstance(x, (pd.Series, pd.DataFrame)):
+            x = x.to_numpy()
+        elif hasattr(x, 'keys'):
+            x = gv.BufferDict(x).buf
+        elif isinstance(x, collections.abc.Iterable) and not isinstance(x, (np.ndarray, list, tuple)):
+            x = list(x)
+
+        self.data = np.asarray(x)
+        self.is_gvar = (self.data.dtype == object and self.data.size > 0
+                and isinstance(self.data.flat[0], gv._gvarcore.GVar))
+
+    @functools.cached_property
+    def mean(self):
+        if isinstance(self.data, Gaussians):
+            return self.data.mean
+        if self.is_gvar:
+            return gv.mean(self.data)
+        if np.issubdtype(self.data.dtype, np.number):
+            return self.data.astype(np.float64, copy=False)
+        # Dates and such are left for matplotlib to interpret.
+        return self.data
+
+    @functools.cached_property
+    def var(self):
+        if isinstance(self.data, Gaussians):
+            return self.data.var
+        if self.is_gvar:
+            return gv.var(self.data)
+        return np.zeros(self.data.shape)
+
+    @functools.cached_property
+    def sdev(self):
+        return np.sqrt(self.var)
+
+def values(x):
+    """ Wrap `x` as `Values`, unless it already is.
+
+    While a `Cache` is active, the same gvars are wrapped by the same `Values`,
+    so their means and standard deviations are extracted only once.
+    """
+    if isinstance(x, Values):
+        return x
+    v = Values(x)
+    if v.is_gvar and not isinstance(v.data, Gaussians):
+        v = cached('values', [v.data], lambda: v)
+    return v
@@ -0,0 +1,55 @@
+import gvar as gv
+import numpy as np
+
+def refine(f, start, stop, tolerance=1e-3, width=1, initial=17, max_points=10000):
+    """ Sample a gvar-valued function only as finely as a band drawn through the samples needs.
+
+    Args:
+        f:      A function of an array of t-values which returns an array of gvars, with t as its last axis.
+        start, stop: The range of t.
+        tolerance: How far, as a fraction of the band's extent, the band may stray from the straight lines between samples.
+        width:  How many standard deviations the band is wide.
+        initial: How many evenly-spaced samples to start from.
+        max_points: The most samples to take.
+
+    Returns:
+        The t-values, in order, and the gvars of `f` at them.
+
+    Each round evaluates `f` once, at the midpoints of all the intervals still to check.
+    An interval is split when, at its midpoint, the mean or the mean ± `width` standard deviations
+    of any component of `f` is farther than the tolerance from halfway between the ends,
+    which happens where the band curves sharply.
+    """
+    t = np.linspace(start, stop, initial)
+    g = np.asarray(f(t))
+    mean, sdev = gv.mean(g), gv.sdev(g)
+    smallest = abs(stop - start) * 1e-9
+
+    check = np.arange(len(t) - 1)
+    while check.size and len(t) < max_points:
+        check = check[:max_points - len(t)]
+        left, right = t[check], t[check+1]
+        middle = (left + right) / 2
+        new = np.asarray(f(middle))
+        new_mean, new_sdev = gv.mean(new), gv.sdev(new)
+
+        # How far the band at each midpoint is from the straight lines between the interval's ends,
+        # relative to the extent of each component.
+        extent = np.ptp(np.concatenate((mean - width*sdev, mean + width*sdev), axis=-1), axis=-1)[..., np.newaxis]
+        extent = np.where(extent > 0, extent, 1)
+        miss = (np.abs(new_mean - (mean[..., check] + mean[..., check+1])/2)
+                + width*np.abs(new_sdev - (sdev[..., check] + sdev[..., check+1])/2)) / extent
+        miss = miss.reshape(-1, len(check)).max(axis=0)
+        split = (miss > tolerance) & (right - left > smallest)
+
+        t = np.concatenate((t, middle))
+        order = np.argsort(t, kind='stable')
+        t = t[order]
+        g, mean, sdev = (np.concatenate((a, b), axis=-1)[..., order]
+                for a, b in ((g, new), (mean, new_mean), (sdev, new_sdev)))
+
+        # Both halves of a split interval are checked in the next round.
+        check = np.searchsorted(t, np.concatenate((left[split], middle[split])))
+        check.sort()
+
+    return t, g
@@ -0,0 +1,77 @@
+import collections
+
+import numpy as np
+
+# The caches in use, innermost last.
+_active = []
+
+def _identity(data):
+    # gvars are immutable, so the same objects always have the same means and covariances.
+    # Their ids stay valid because the cache keeps the arrays that hold them alive.
+    data = np.asarray(data, dtype=object)
+    return data.shape, np.fromiter(map(id, data.flat), dtype=np.intp, count=data.size).tobytes()
+
+def cached(kind, arrays, compute):
+    """ Return `compute()`, remembered by the active `Cache` under the identity of the gvars in `arrays`.
+
+    Args:
+        kind:       A name for what is computed, so that different quantities of the same gvars are kept apart.
+        arrays:     A list of arrays of gvars that the result depends on.
+        compute:    A function of no arguments that computes the result.
+
+    Without an active cache, `compute()` is simply called.
+    """
+    if not _active:
+        return compute()
+    return _active[-1]._get((kind, *(_identity(a) for a in arrays)), arrays, compute)
+
+class Cache:
+    """ Remember means, standard deviations and covariances of gvars across plotting calls.
+
+    Args:
+        maxsize: The most results to keep; the least recently used are forgotten first.
+
+    Use as a context manager; while active, the plotters look up the gvars they are given by identity,
+    and only extract means, standard deviations and covariances the first time::
+
+        cache = gvarplot.Cache()
+        with cache:
+            gvarplot.mean(ax, x, y)
+            gvarplot.errorband(ax, x, y)   # reuses the means of y and computes only its sdevs
+            gvarplot.ellipses(ax, x, y)
+
+    The same cache may be entered again later.  `hits` and `misses` count lookups.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __enter__(self):
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exception):
+        _active.remove(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """ Forget everything. """
+        self._entries.clear()
+
+    def _get(self, key, arrays, compute):
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][1]
+
+        self.misses += 1
+        result = compute()
+        self._entries[key] = (arrays, result)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return result
@@ -0,0 +1,175 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+
+import gvar as gv
+import numpy as np
+
+from gvarplot.render import _use_agg
+
+# Where the content hashes of what made each output are kept, one file per output directory.
+MANIFEST = '.gvarplot.json'
+
+def _numbers(x):
+    # Keys of a BufferDict that mixes gvars and numbers hold object arrays, even for plain numbers.
+    x = np.asarray(x)
+    if x.size and not isinstance(x.flat[0], gv.GVar):
+        return x.astype(float)
+    return x
+
+def _series(data, spec):
+    # The x- and y-values named in the spec.
+    if spec['y'] is None:
+        if hasattr(data, 'keys'):
+            raise ValueError("--y is needed to pick the gvars to plot from a dictionary.")
+        y = data
+    else:
+        y = data[spec['y']]
+    y = np.ravel(y)
+    x = np.arange(len(y)) if spec['x'] is None else np.ravel(_numbers(data[spec['x']]))
+    return x, y
+
+def _labelled(ax, spec):
+    if spec['x'] is not None:
+        ax.set_xlabel(spec['x'])
+    if spec['y'] is not None:
+        ax.set_ylabel(spec['y'])
+    return ax.figure
+
+def _uncertainty_matrix(data, spec):
+    from gvarplot import uncertainty_matrix
+    gvs = data if spec['y'] is None else data[spec['y']]
+    return uncertainty_matrix(gvs, **spec['options'])[0]
+
+def _errorband(data, spec):
+    import matplotlib.pyplot as plt
+    from gvarplot import errorband
+    fig, ax = plt.subplots()
+    errorband(ax, *_series(data, spec), **spec['options'])
+    return _labelled(ax, spec)
+
+def _errorbar(data, spec):
+    import matplotlib.pyplot as plt
+    from gvarplot import errorbar
+    fig, ax = plt.subplots()
+    errorbar(ax, *_series(data, spec), **spec['options'])
+    return _labelled(ax, spec)
+
+PLOTS = {
+        'uncertainty_matrix':   _uncertainty_matrix,
+        'errorband':            _errorband,
+        'errorbar':             _errorbar,
+        }
+
+def _plot(job):
+    # Runs in a worker: load one file, plot it, save the figure, and report rather than raise any failure,
+    # so that one bad file does not stop the rest.
+    import matplotlib.pyplot as plt
+
+    source, target, spec = job
+    try:
+        data = gv.load(source)
+        # A dumped fit is plotted by its parameters.
+        data = data.p if hasattr(data, 'p') else data
+        figure = PLOTS[spec['plot']](data, spec)
+        figure.savefig(target)
+        plt.close(figure)
+    except Exception as error:
+        return target, f'{type(error).__name__}: {error}'
+    return target, None
+
+def _hash(source, spec):
+    digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode())
+    with open(source, 'rb') as f:
+        for block in iter(lambda: f.read(2**20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='gvarplot',
+            description="Plot many files of gvars, saved with gv.dump, in one process with a pool of workers. "
+                "Outputs whose input file and options have not changed since they were last made are skipped.")
+    parser.add_argument('plot', choices=list(PLOTS), help="what to plot")
+    parser.add_argument('files', nargs='+', help="files saved with gv.dump: gvars, dictionaries or BufferDicts of them, or fits")
+    parser.add_argument('-y', '--y', help="the key of the gvars to plot; needed for errorband and errorbar of dictionaries")
+    parser.add_argument('-x', '--x', help="the key of the x-values, numbers or gvars; by default the gvars are plotted against their index")
+    parser.add_argument('-s', '--sigma', type=float, nargs='+', help="the standard deviations at which to draw")
+    parser.add_argument('-o', '--output', help="the directory to save figures in, so the files' names must differ; by default next to each file")
+    parser.add_argument('-f', '--format', default='png', help="the format, and extension, of the figures (default: png)")
+    parser.add_argument('-j', '--processes', type=int, help="the number of worker processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="remake every figure, changed or not")
+    return parser
+
+def main(argv=None):
+    """ The `gvarplot` command. """
+    parser = _parser()
+    args = parser.parse_args(argv)
+
+    options = {} if args.sigma is None else {'sigma': args.sigma}
+    spec = {'plot': args.plot, 'x': args.x, 'y': args.y, 'format': args.format, 'options': options}
+
+    jobs, hashes, skipped = [], {}, 0
+    manifests = {}
+    outputs = {}
+    for source in args.files:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        directory = args.output if args.output is not None else os.path.dirname(source)
+        target = os.path.join(directory, f'{stem}.{args.format}')
+        # Files of the same name from different directories would overwrite each other's figure and manifest entry.
+        if os.path.normpath(target) in outputs:
+            parser.error(f"{outputs[os.path.normpath(target)][0]} and {source} would both be saved as {target}.")
+        outputs[os.path.normpath(target)] = source, directory, target
+
+    if args.output is not None:
+        os.makedirs(args.output, exist_ok=True)
+    for source, directory, target in outputs.values():
+        if directory not in manifests:
+            manifests[directory] = _manifest(directory)
+
+        digest = _hash(source, spec)
+        name = os.path.basename(target)
+        if not args.force and manifests[directory].get(name) == digest and os.path.exists(target):
+            skipped += 1
+            continue
+        jobs.append((source, target, spec))
+        hashes[target] = (directory, name, digest)
+
+    if args.processes == 1 or len(jobs) <= 1:
+        _use_agg()
+        results = map(_plot, jobs)
+        pool = None
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=args.processes, initializer=_use_agg)
+        results = pool.map(_plot, jobs)
+
+    failed = 0
+    try:
+        for target, error in results:
+            directory, name, digest = hashes[target]
+            if error is None:
+                manifests[directory][name] = digest
+                print(target)
+            else:
+                # A failed output must be remade next time, even if an older version exists.
+                manifests[directory].pop(name, None)
+                print(f'{target}: {error}', file=sys.stderr)
+                failed += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        for directory, manifest in manifests.items():
+            with open(os.path.join(directory, MANIFEST), 'w') as f:
+                json.dump(manifest, f, indent=0, sort_keys=True)
+
+    print(f'{len(jobs) - failed} made, {skipped} unchanged, {failed} failed.', file=sys.stderr)
+    return 1 if failed else 0
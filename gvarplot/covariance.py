@@ -0,0 +1,41 @@
+import gvar as gv
+import numpy as np
+
+from gvarplot._values import values
+from gvarplot.cache import cached
+from gvarplot.gaussians import Gaussians
+
+def pair_covariance(x, y):
+    """ Compute the 2x2 covariance blocks of corresponding pairs of gvars.
+
+    Args:
+        x:  An array of gvars, or `Gaussians`.
+        y:  An array of gvars with the same shape as `x`, or `Gaussians` from the same arrays as `x`.
+
+    Returns:
+        Three float arrays `(var_x, var_y, cov_xy)` with the shape of `x`.
+
+    Rather than calling `gv.evalcov` on every (`x`, `y`) pair, each array's derivative vectors
+    are contracted against the primary covariance once, and the off-diagonal element comes from
+    the variance of a sum, cov(x, y) = (var(x+y) - var(x) - var(y)) / 2.  The sum is of x and y
+    each divided by its standard deviation, so that neither swamps the other when their scales differ.
+    """
+    x, y = values(x), values(y)
+    if x.data.shape != y.data.shape:
+        raise ValueError(f"x and y must have the same shape, not {x.data.shape} and {y.data.shape}.")
+
+    if isinstance(x.data, Gaussians) or isinstance(y.data, Gaussians):
+        if not (isinstance(x.data, Gaussians) and isinstance(y.data, Gaussians)):
+            raise TypeError("Gaussians can only be paired with Gaussians.")
+        return x.var, y.var, x.data.pair_cov(y.data)
+
+    def standardized():
+        # A gvar without uncertainty is left as it is; its covariance is 0 anyway.
+        scale_x = np.where(x.sdev > 0, x.sdev, 1)
+        scale_y = np.where(y.sdev > 0, y.sdev, 1)
+        var = gv.var(x.data/scale_x + y.data/scale_y) - x.var/scale_x**2 - y.var/scale_y**2
+        return scale_x * scale_y * var / 2
+
+    cov_xy = cached('pair_covariance', [x.data, y.data], standardized)
+
+    return x.var, y.var, cov_xy
@@ -1,11 +1,97 @@
-
-
 import gvar as gv
 import numpy as np
 
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+import matplotlib.collections as collections
+import matplotlib.legend as legend
+import matplotlib.legend_handler as legend_handler
+
+from gvarplot import raster
+from gvarplot._values import values
+from gvarplot.covariance import pair_covariance
+from gvarplot.profile import profiled, phase, points
+
+def _geometry(var_x, var_y, cov_xy):
+    """ Semi-major axes, semi-minor axes and angles (in degrees) of one-sigma error ellipses.
+
+    The eigenvalues of each [[var_x, cov_xy], [cov_xy, var_y]] block are computed in closed form,
+    so that arrays of any length are handled at once.
+    """
+    center = (var_x + var_y) / 2
+    radius = np.hypot((var_x - var_y) / 2, cov_xy)
+    major = np.sqrt(center + radius)
+    # Rounding can push the smaller eigenvalue of a singular block slightly negative.
+    minor = np.sqrt(np.clip(center - radius, 0, None))
+    # For uncorrelated blocks arctan2 gives 0 when var_x >= var_y and 90 degrees otherwise,
+    # so the degenerate cases need no special handling.
+    angle = np.degrees(np.arctan2(2*cov_xy, var_x - var_y) / 2)
+    return major, minor, angle
+
+class EllipseCollection(collections.EllipseCollection):
+    """ The error ellipses of many points at several sigmas, drawn as a single artist.
+
+    Args:
+        x, y:   The centers of the ellipses.
+        major, minor, angle: The semi-axes and angle, in degrees, of each point's one-sigma ellipse.
+        sigma:  A list of standard deviations for which to draw an ellipse for each point.
+        **kwargs: options accepted by `matplotlib.collections.EllipseCollection`.
+
+    Every point has an ellipse for each sigma, all in one collection, with those of the smallest sigma drawn first,
+    as they would be by one collection per sigma.
+    """
 
+    def __init__(self, x, y, major, minor, angle, sigma, **kwargs):
+        self._sigma = np.asarray(sigma, dtype=float)
+        super().__init__([], [], [], units='xy', **kwargs)
+        self.set_ellipses(x, y, major, minor, angle)
+
+    def set_ellipses(self, x, y, major, minor, angle):
+        """ Move and reshape the ellipses, with arguments as for the constructor. """
+        # The collection draws one ellipse per offset, so each point's is repeated, scaled, for every sigma.
+        # Like mpl.patches.Ellipse, EllipseCollection wants full axes, not semi-{minor,major} axes.
+        scale = 2*self._sigma[:, np.newaxis]
+        self.set_widths((scale * np.asarray(major, dtype=float)).ravel())
+        self.set_heights((scale * np.asarray(minor, dtype=float)).ravel())
+        self.set_angles(np.tile(angle, len(self._sigma)))
+        self.set_offsets(np.tile(np.column_stack((x, y)), (len(self._sigma), 1)))
+
+# matplotlib has no legend handler for EllipseCollections; show them with a swatch like fill_between's.
+legend.Legend.update_default_handler_map({EllipseCollection: legend_handler.HandlerPolyCollection()})
+
+def _draw(ax, x, y, major, minor, angle, sigma, **kwargs):
+    e = EllipseCollection(x, y, major, minor, angle, sigma, offset_transform=ax.transData, **kwargs)
+    ax.add_collection(e, autolim=False)
+    return e
+
+def _limits(ax, X, Y, var_x, var_y, sigma):
+    # The collections don't report the extent of the ellipses themselves,
+    # but the widest ellipse around each point reaches exactly max(sigma) sdevs in x and y.
+    reach = max(sigma, default=0)
+    dX, dY = reach*np.sqrt(var_x), reach*np.sqrt(var_y)
+    ax.update_datalim(np.column_stack((X-dX, Y-dY)))
+    ax.update_datalim(np.column_stack((X+dX, Y+dY)))
+    ax.autoscale_view()
+
+def _density(ax, X, Y, var_x, var_y, cov_xy, sigma, contours, **kwargs):
+    if ax.get_xscale() != 'linear' or ax.get_yscale() != 'linear':
+        raise ValueError("Densities can only be drawn on linear axes.")
+
+    # One pixel of the image for every pixel of the axis, over what the axis shows now.
+    rows, columns = (max(int(np.ceil(n)), 1) for n in (ax.bbox.height, ax.bbox.width))
+    extent = (*ax.get_xlim(), *ax.get_ylim())
+    with phase('geometry'):
+        image = raster.density(X, Y, var_x, var_y, cov_xy, extent, (rows, columns))
+
+    with phase('artists'):
+        ax.imshow(image, extent=extent,
+                **{'origin': 'lower', 'interpolation': 'nearest', 'aspect': 'auto', 'cmap': 'Blues', **kwargs})
+        if contours:
+            left, right, bottom, top = extent
+            centers_x = left + (np.arange(columns) + 0.5) * (right - left) / columns
+            centers_y = bottom + (np.arange(rows) + 0.5) * (top - bottom) / rows
+            ax.contour(centers_x, centers_y, image, levels=raster.levels(image, sigma, len(X)),
+                    **{'colors': 'black', 'linewidths': 0.5, **({} if contours is True else contours)})
+
+@profiled
 def ellipse(ax, x, y, sigma=[1], **kwargs):
     """ Plot an error ellipse around a pair of gvars.
 
@@ -15,38 +101,16 @@ def ellipse(ax, x, y, sigma=[1], **kwargs):
         y:  A gvar indicating the y-value.
 
         sigma: A list of standard deviations for which to draw an ellipse.
-        **kwargs: options accepted by matplotlib.patches.Ellipse.  The default is alpha=0.2.
+        **kwargs: options accepted by matplotlib.collections.EllipseCollection.  The default is alpha=0.2.
     """
 
     if (not isinstance(x, gv._gvarcore.GVar)) or (not isinstance(y, gv._gvarcore.GVar)):
         raise TypeError("GVars required for an error ellipse.")
 
-    defaults = {
-            'alpha': 0.2,
-            }
-    defaults.update(kwargs)
+    ellipses(ax, [x], [y], sigma=sigma, **kwargs)
 
-    C = gv.evalcov((x,y))
-    w, v = np.linalg.eigh(C)
-    w = np.sort(w)[::-1]
-
-    if C[0,1] == 0 and C[0,0] >= C[1,1]:
-        angle = 0
-    elif C[0,1] == 0 and C[0,0] < C[1,1]:
-        angle = np.pi/2
-    else:
-        angle = np.arctan2(w[0]-C[0,0], C[0,1])
-    
-    # matplotlib wants angle in degrees
-    angle = angle*180/np.pi
-
-    for s in sigma:
-        # mpl.patches.Ellipse wants full axes, not semi-{minor,major} axes.
-        axes = 2*s*np.sqrt(w) # ... hence the 2*.
-        e = patches.Ellipse([x.mean, y.mean], *axes, angle=angle, **defaults)
-        ax.add_patch(e)
-
-def ellipses(ax, x, y, sigma=[1], **kwargs):
+@profiled
+def ellipses(ax, x, y, sigma=[1], density=False, contours=False, **kwargs):
     """ Plot error ellipses around arrays of gvars.
 
     Args:
@@ -54,19 +118,85 @@ def ellipses(ax, x, y, sigma=[1], **kwargs):
         x:  An array of gvars indicating the x-value on which to center ellipses.
         y:  An array of corresponding gvars indicating the y-values on which to center the ellipses.
         sigma: A list of standard deviations for which to draw an ellipse for each (`x`, `y`) pair.
-        **kwargs: options accepted by `matplotlib.patches.Ellipse`.  The default `alpha=0.2`.
+        density: If True, instead of ellipses show the sum of the pairs' normal distributions as one image,
+            with a pixel for each pixel of the axis, over the axis' limits once they include every pair.
+            Its size and drawing time do not depend on the number of pairs; it is not recomputed if the axis is zoomed.
+        contours: With `density`, True or a dictionary of options for matplotlib's `contour`
+            to outline the densest regions that hold as many of the points as each sigma ellipse holds of a normal distribution.
+        **kwargs: options accepted by `matplotlib.collections.EllipseCollection`.  The default `alpha=0.2`.
+            With `density`, options accepted by matplotlib's `imshow` instead; the default is cmap='Blues'.
 
     The correlation between `x` and `y` is used to determine the corresponding error ellipse.
+    The covariances and ellipse geometries of all the pairs are computed together,
+    and the ellipses are drawn as one `EllipseCollection`.
+    """
+
+    defaults = {
+            'alpha': 0.2,
+            }
+    defaults.update(kwargs)
+
+    x, y = values(x), values(y)
+    points(x.data.size)
+    if x.data.size == 0:
+        return
+
+    with phase('covariance'):
+        var_x, var_y, cov_xy = (np.ravel(v) for v in pair_covariance(x, y))
+    with phase('values'):
+        X, Y = np.ravel(x.mean), np.ravel(y.mean)
+
+    if not density:
+        with phase('geometry'):
+            major, minor, angle = _geometry(var_x, var_y, cov_xy)
+        with phase('artists'):
+            _draw(ax, X, Y, major, minor, angle, sigma, **defaults)
+
+    with phase('artists'):
+        _limits(ax, X, Y, var_x, var_y, sigma)
+
+    if density:
+        _density(ax, X, Y, var_x, var_y, cov_xy, sigma, contours, **kwargs)
+
+def _from_cov(means, covs):
+    # The centers and the 2x2 covariance blocks' elements.
+    means, covs = np.asarray(means, dtype=float), np.asarray(covs, dtype=float)
+    if means.ndim != 2 or means.shape[1] != 2 or covs.shape != (len(means), 2, 2):
+        raise ValueError(f"means must have shape (N, 2) and covs (N, 2, 2), not {means.shape} and {covs.shape}.")
+    # Any asymmetry from rounding is split evenly.
+    return means[:, 0], means[:, 1], covs[:, 0, 0], covs[:, 1, 1], (covs[:, 0, 1] + covs[:, 1, 0]) / 2
+
+@profiled
+def ellipses_from_cov(ax, means, covs, sigma=[1], density=False, contours=False, **kwargs):
+    """ Plot error ellipses from means and covariance matrices, without gvars.
+
+    Args:
+        ax: A matplotlib axis.
+        means: An (N, 2) array of the (x, y) centers of the ellipses.
+        covs: An (N, 2, 2) array of the corresponding covariance matrices.
+        sigma, density, contours, **kwargs: as for `ellipses`.
+
+    The axes and angles of all N ellipses come from the closed form that `ellipses` uses,
+    with no loop over the matrices, and uncorrelated, equal-variance and zero-variance matrices need no special cases.
     """
+    defaults = {
+            'alpha': 0.2,
+            }
+    defaults.update(kwargs)
+
+    X, Y, var_x, var_y, cov_xy = _from_cov(means, covs)
+    points(len(X))
+    if len(X) == 0:
+        return
 
-    defaults = dict(kwargs)
+    if not density:
+        with phase('geometry'):
+            major, minor, angle = _geometry(var_x, var_y, cov_xy)
+        with phase('artists'):
+            _draw(ax, X, Y, major, minor, angle, sigma, **defaults)
 
-    if 'label' not in defaults:
-        for a, b in zip(x, y):
-            ellipse(ax, a, b, sigma=sigma, **defaults)
-    else:
-        ellipse(ax, x[0], y[0], sigma=sigma, **defaults)
-        del defaults['label']
-        for a, b in zip(x[1:], y[1:]):
-            ellipse(ax, a, b, sigma=sigma, **defaults)
+    with phase('artists'):
+        _limits(ax, X, Y, var_x, var_y, sigma)
 
+    if density:
+        _density(ax, X, Y, var_x, var_y, cov_xy, sigma, contours, **kwargs)
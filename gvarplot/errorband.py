@@ -1,26 +1,279 @@
 
-import gvar as gv
-import matplotlib as plt
-from gvarplot import ellipses
+import numpy as np
+import matplotlib.collections as collections
+from gvarplot._values import values
+from gvarplot.covariance import pair_covariance
+from gvarplot.ellipses import ellipses
+from gvarplot.lod import level_of_detail, envelope, Colors
+from gvarplot.adaptive import refine
+from gvarplot.profile import profiled, phase, points
 
 defaults = {
         'alpha': 0.2,
         }
 
-def errorband(ax, x, y, sigma=[1,2,3], **kwargs):
-    if isinstance(x[0], gv._gvarcore.GVar) and isinstance(y[0], gv._gvarcore.GVar):
-        # We can do something smarter than drawing zillions of ellipses
-        # to get an error band by considering the curve, and finding
-        # the turning points of distance to the tangent.
-        # But, for now, this hack suffices.
-        ellipses(ax, x, y, sigma, **{**defaults, **kwargs})
+def _envelope(X, Y, var_x, var_y, cov_xy):
+    # The point of an error ellipse farthest from the tangent of the curve
+    # lies along C.n, where n is the unit normal to the curve,
+    # at a distance sqrt(n.C.n) from the tangent (per sigma).
+    # The band's edges pass through these turning points.
+    tx, ty = np.gradient(X), np.gradient(Y)
+    nx, ny = -ty, tx
+
+    # Scaling n does not change C.n / sqrt(n.C.n), so there is no need to normalize.
+    Cnx = var_x*nx + cov_xy*ny
+    Cny = cov_xy*nx + var_y*ny
+    distance = np.sqrt(nx*Cnx + ny*Cny)
+
+    # Points without uncertainty, or where the curve stalls, have no extent.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dX = np.where(distance > 0, Cnx / distance, 0.)
+        dY = np.where(distance > 0, Cny / distance, 0.)
+    return dX, dY
+
+def _refined(x, y, sigma, tolerance):
+    # The x- and y-values at which to draw the band of a function y over the range x.
+    with phase('samples'):
+        t, g = refine(y, *x, tolerance=tolerance, width=max(sigma, default=1))
+    return (t, g) if g.ndim == 1 else (g[0], g[1])
+
+@profiled
+def errorband(ax, x, y, sigma=[1,2,3], lod=False, tolerance=1e-3, **kwargs):
+    """ Plot a band around a curve of gvars.
+
+    Args:
+        ax: A matplotlib axis.
+        x:  An array of x-values; either numbers or gvars.
+        y:  An array of corresponding gvars, or a function of an array of t-values (see below).
+        sigma: A list of standard deviations for which to draw a band.
+        lod: If True and `x` is numbers, only use the points that matter at the axis' resolution,
+            and recompute them when the x range changes.  Requires increasing x.
+        tolerance: If `y` is a function, how far, as a fraction of the band's extent,
+            the drawn band may stray from the function's.
+        **kwargs: options accepted by matplotlib's `fill_between` or, if `x` has gvars, `PolyCollection`.
+            The default is alpha=0.2.
+
+    When both `x` and `y` are gvars the band is the envelope of the error ellipses
+    of the points along the curve, traced in the order the points are given;
+    a single point gets its error ellipses.
+
+    When `y` is a function, `x` is a range `(start, stop)` of t-values and `y(t)` returns gvars with t as the last axis:
+    either an array of y-values, for a band over t, or a pair `[x(t), y(t)]`, for a band around a parametric curve.
+    Rather than being evaluated on a fine uniform grid, `y` is evaluated on a coarse one which is then refined,
+    a batch of points at a time, only where the band bends too much to be drawn by straight lines to within `tolerance`.
+    """
+    if callable(y):
+        x, y = _refined(x, y, sigma, tolerance)
+
+    x, y = values(x), values(y)
+    points(y.data.size)
+
+    if x.is_gvar and y.is_gvar:
+        if x.data.size < 2:
+            # A single point has no curve to follow, so draw its error ellipses instead.
+            ellipses(ax, x.data, y.data, sigma, **{**defaults, **kwargs})
+            return
+        with phase('values'):
+            X, Y = x.mean, y.mean
+        with phase('covariance'):
+            C = pair_covariance(x, y)
+        with phase('geometry'):
+            dX, dY = _envelope(X, Y, *C)
+        with phase('artists'):
+            for s in sigma:
+                # One polygon: out along one edge of the band and back along the other.
+                # Unlike ax.fill, a PolyCollection finds its data limits without visiting every vertex in Python.
+                band = collections.PolyCollection([np.column_stack((
+                        np.concatenate((X+s*dX, (X-s*dX)[::-1])),
+                        np.concatenate((Y+s*dY, (Y-s*dY)[::-1])),
+                        ))], **{**defaults, **kwargs})
+                ax.add_collection(band)
+                if 'label' in kwargs:
+                    del kwargs['label']
         return
 
-    for s in sigma:
-        ax.fill_between(x,
-                gv.mean(y)-s*gv.sdev(y),
-                gv.mean(y)+s*gv.sdev(y),
-                **{**defaults, **kwargs})
-        if 'label' in kwargs:
-            del kwargs['label']
+    with phase('values'):
+        x.mean, y.mean, y.sdev
+
+    if lod:
+        # Reduce each band to its extent in each pixel column.
+        colors = Colors(kwargs, keys=('color', 'facecolor', 'facecolors', 'fc'), name='facecolor')
+        def draw(bins):
+            options = {**defaults, **kwargs}
+            bands = []
+            for n, s in enumerate(sigma):
+                X, lower, upper = envelope(bins, x.mean, y.mean-s*y.sdev, y.mean+s*y.sdev)
+                band = ax.fill_between(X, lower, upper, **options, **colors.style(n))
+                colors.record(n, band.get_facecolor()[0])
+                bands.append(band)
+                options.pop('label', None)
+            return bands
+        with phase('artists'):
+            level_of_detail(ax, x.mean, draw)
+        return
+
+    with phase('artists'):
+        for s in sigma:
+            ax.fill_between(x.mean,
+                    y.mean-s*y.sdev,
+                    y.mean+s*y.sdev,
+                    **{**defaults, **kwargs})
+            if 'label' in kwargs:
+                del kwargs['label']
+
+def _polygon(x, mean, sdev, s):
+    # Along the top of a band and back along the bottom, as fill_between draws it.
+    return np.concatenate((
+            np.column_stack((x, mean+s*sdev)),
+            np.column_stack((x, mean-s*sdev))[::-1],
+            ))
+
+class LiveErrorband:
+    """ An errorband that grows and changes as new estimates arrive, for live plots.
+
+    Args:
+        ax: A matplotlib axis.
+        x:  An initial array of x-values; numbers.
+        y:  An initial array of corresponding gvars.
+        sigma: A list of standard deviations for which to draw a band.
+        chunk: The number of points in each piece of the band.
+        **kwargs: options accepted by matplotlib's `PolyCollection`.  The defaults are alpha=0.2 and linewidth=0.
+
+    The band is drawn in pieces of `chunk` points.
+    Finished pieces are drawn with the rest of the figure, while the last, growing piece is animated,
+    so that `append` only redraws that piece over a saved background (blitting) rather than the whole figure.
+    When a piece fills up it joins the finished ones, which costs one full redraw every `chunk` points.
+    Changing points with `update` edits the vertices of the pieces that contain them in place.
+    """
+
+    def __init__(self, ax, x=[], y=[], sigma=[1,2,3], chunk=1024, **kwargs):
+        self.ax = ax
+        self.sigma = sigma
+        self.chunk = chunk
+
+        self.x = np.zeros(0)
+        self.mean = np.zeros(0)
+        self.sdev = np.zeros(0)
+        self.frozen = 0     # The number of finished pieces.
+
+        # Without blitting, the growing piece is simply drawn with everything else.
+        self._blit = ax.figure.canvas.supports_blit
+        self._background = None
+        ax.figure.canvas.mpl_connect('draw_event', self._on_draw)
+
+        options = {**defaults, 'linewidth': 0, **kwargs}
+        self._finished, self._growing, self._pieces = [], [], []
+        for s in sigma:
+            finished = collections.PolyCollection([], **options)
+            options.pop('label', None)
+            growing = collections.PolyCollection([], animated=self._blit, **options)
+            ax.add_collection(finished, autolim=False)
+            ax.add_collection(growing, autolim=False)
+            self._finished.append(finished)
+            self._growing.append(growing)
+            self._pieces.append([])
+
+        self.append(x, y)
+
+    def __len__(self):
+        return len(self.x)
+
+    def append(self, x, y):
+        """ Add points to the end of the band.
+
+        Args:
+            x: A number or an array of numbers.
+            y: A corresponding gvar or array of gvars.
+        """
+        x, y = np.atleast_1d(values(x).mean), values(y)
+        if len(x) == 0:
+            return
+        self.x = np.concatenate((self.x, x))
+        self.mean = np.concatenate((self.mean, np.atleast_1d(y.mean)))
+        self.sdev = np.concatenate((self.sdev, np.atleast_1d(y.sdev)))
+
+        # Finish every piece whose last point (the first of the next piece) has arrived.
+        finished = False
+        while (self.frozen+1)*self.chunk < len(self):
+            piece = slice(self.frozen*self.chunk, (self.frozen+1)*self.chunk + 1)
+            for s, pieces, collection in zip(self.sigma, self._pieces, self._finished):
+                pieces.append(_polygon(self.x[piece], self.mean[piece], self.sdev[piece], s))
+                # Filling closes the polygon anyway, and unclosed paths keep these very arrays as vertices.
+                collection.set_verts(pieces, closed=False)
+            self.frozen += 1
+            finished = True
+
+        rescale = self._extend_limits(len(self)-len(x))
+        self._set_growing()
+        self._redraw(full=finished or rescale)
+
+    def update(self, index, y):
+        """ Replace the estimates of existing points.
+
+        Args:
+            index: An index or array of indices of the points to change.
+            y: A corresponding gvar or array of gvars.
+        """
+        index = np.atleast_1d(np.arange(len(self))[index])
+        if index.size == 0:
+            return
+        y = values(y)
+        self.mean[index] = y.mean
+        self.sdev[index] = y.sdev
+
+        # A point on the boundary between two pieces belongs to both.
+        touched = np.unique(np.concatenate((index // self.chunk, (index-1) // self.chunk)))
+        touched = touched[(0 <= touched) & (touched < self.frozen)]
+        for c in touched:
+            piece = slice(c*self.chunk, (c+1)*self.chunk + 1)
+            for s, pieces in zip(self.sigma, self._pieces):
+                # The collection's paths share these vertex arrays.
+                pieces[c][:] = _polygon(self.x[piece], self.mean[piece], self.sdev[piece], s)
+        if len(touched):
+            for collection in self._finished:
+                collection.stale = True
+
+        rescale = self._extend_limits(index.min())
+        self._set_growing()
+        self._redraw(full=len(touched) > 0 or rescale)
+
+    def _set_growing(self):
+        piece = slice(self.frozen*self.chunk, None)
+        for s, collection in zip(self.sigma, self._growing):
+            collection.set_verts([_polygon(self.x[piece], self.mean[piece], self.sdev[piece], s)])
+
+    def _extend_limits(self, start):
+        # Whether the changed points spill out of the view, which must then be rescaled.
+        if len(self) == start:
+            return False
+        s = max(self.sigma, default=0)
+        x = self.x[start:]
+        lower = self.mean[start:] - s*self.sdev[start:]
+        upper = self.mean[start:] + s*self.sdev[start:]
+        self.ax.update_datalim(np.column_stack((np.r_[x, x], np.r_[lower, upper])))
+
+        (x0, x1), (y0, y1) = sorted(self.ax.get_xlim()), sorted(self.ax.get_ylim())
+        outside = (x.min() < x0 or x1 < x.max() or lower.min() < y0 or y1 < upper.max())
+        if outside and (self.ax.get_autoscalex_on() or self.ax.get_autoscaley_on()):
+            self.ax.autoscale_view()
+            return True
+        return False
+
+    def _on_draw(self, event):
+        # A full draw skips animated artists; save what it drew and put the growing piece on top.
+        # When saving to a file, animated artists are drawn like any other.
+        if not self._blit or event.canvas.is_saving():
+            return
+        self._background = event.canvas.copy_from_bbox(self.ax.bbox)
+        for collection in self._growing:
+            collection.draw(event.renderer)
 
+    def _redraw(self, full=False):
+        canvas = self.ax.figure.canvas
+        if full or not self._blit or self._background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self._background)
+        for collection in self._growing:
+            self.ax.draw_artist(collection)
+        canvas.blit(self.ax.bbox)
@@ -1,33 +1,39 @@
-import numpy as np
-import pandas as pd
-import gvar as gv
+from gvarplot._values import values
+from gvarplot.lod import level_of_detail, extremes, Colors
+from gvarplot.profile import profiled, phase, points
 
-def errorbar(ax, x, y, sigma=[1], **kwargs):
-    if isinstance(x, pd.Series):
-        errorbar(ax, np.array(x), y, **kwargs)
-        return
-    elif isinstance(x[0], gv._gvarcore.GVar):
-        A = np.array([a.mean for a in x])
-        dA= np.array([a.sdev for a in x])
-    else:
-        A = np.array(x)
-        dA= np.zeros(x.shape)
-
-    if isinstance(y, pd.Series):
-        errorbar(ax, x, np.array(y), **kwargs)
-        return
-    elif isinstance(y[0], gv._gvarcore.GVar):
-        B = np.array([b.mean for b in y])
-        dB= np.array([b.sdev for b in y])
-    else:
-        B = np.array(y)
-        dB= np.zeros(y.shape)
+@profiled
+def errorbar(ax, x, y, sigma=[1], lod=False, **kwargs):
+    x, y = values(x), values(y)
+    points(y.data.size)
+    with phase('values'):
+        x.mean, x.sdev, y.mean, y.sdev
 
     defaults = {
     }
     defaults.update(kwargs)
-    
-    for s in sigma:
-        ax.errorbar(A, B, xerr = s*dA, yerr = s*dB, **defaults)
-        if 'label' in defaults:
-            del defaults['label']
+
+    if lod:
+        # Keep the points whose bars reach farthest in each pixel column.
+        colors = Colors(defaults)
+        def draw(bins):
+            options = dict(defaults)
+            containers = []
+            for n, s in enumerate(sigma):
+                k = extremes(bins, x.mean-s*x.sdev, x.mean+s*x.sdev, y.mean-s*y.sdev, y.mean+s*y.sdev)
+                container = ax.errorbar(x.mean[k], y.mean[k], xerr = s*x.sdev[k], yerr = s*y.sdev[k],
+                        **options, **colors.style(n))
+                line, caps, bars = container.lines
+                colors.record(n, line.get_color() if line is not None else bars[0].get_color()[0])
+                containers.append(container)
+                options.pop('label', None)
+            return containers
+        with phase('artists'):
+            level_of_detail(ax, x.mean, draw)
+        return
+
+    with phase('artists'):
+        for s in sigma:
+            ax.errorbar(x.mean, y.mean, xerr = s*x.sdev, yerr = s*y.sdev, **defaults)
+            if 'label' in defaults:
+                del defaults['label']
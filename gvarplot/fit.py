@@ -0,0 +1,89 @@
+import gvar as gv
+import numpy as np
+
+from gvarplot._values import values
+from gvarplot.cache import cached
+from gvarplot.errorbar import errorbar
+from gvarplot.profile import profiled, phase, points
+
+defaults = {
+        'alpha': 0.2,
+        }
+
+def _jacobian(f, p, step):
+    # Central differences of f with respect to each element of p's buffer,
+    # one column per element, each step a small fraction of that element's sdev.
+    # Each step gets a new BufferDict rather than a changed buffer, since a BufferDict keeps the values
+    # of derived keys, like p['E'] for a prior on 'log(E)', once they have been looked up.
+    layout = gv.BufferDict(p) if hasattr(p, 'keys') else None
+    buf = np.array(layout.buf if layout is not None else p, dtype=float).reshape(-1)
+
+    def at(b):
+        return gv.BufferDict(layout, buf=b) if layout is not None else b.reshape(np.shape(p))
+
+    J = np.zeros((np.size(f(at(buf))), buf.size))
+    for k, h in enumerate(step):
+        # A parameter without uncertainty does not contribute, whatever its derivative.
+        if h == 0:
+            continue
+        up, down = buf.copy(), buf.copy()
+        up[k] += h
+        down[k] -= h
+        J[:, k] = (np.ravel(f(at(up))) - np.ravel(f(at(down)))) / (2*h)
+    return J
+
+def _band(result, x):
+    # The x-values, the fit function at the parameters' means there, and its standard deviation.
+    p = values(result.p)
+    with phase('covariance'):
+        C = cached('evalcov', [p.data], lambda: gv.evalcov(p.data.flatten()))
+    with phase('values'):
+        mean = gv.mean(result.p)
+
+    if x is None:
+        if result.x is False or hasattr(result.x, 'keys'):
+            raise ValueError("An x-grid is needed for a fit without x-values.")
+        X = values(result.x).mean
+        x = np.linspace(X.min(), X.max(), 200)
+    x = np.asarray(x, dtype=float)
+
+    def f(params):
+        return result.fcn(x, params) if result.x is not False else result.fcn(params)
+
+    points(x.size)
+    with phase('geometry'):
+        center = np.asarray(f(mean), dtype=float).ravel()
+        J = _jacobian(f, mean, 1e-4*np.ravel(p.sdev))
+        sdev = np.sqrt(np.clip(np.einsum('ik,kl,il->i', J, np.atleast_2d(C), J), 0, None))
+    return x, center, sdev
+
+@profiled
+def fit(ax, result, x=None, sigma=[1,2,3], data=None, **kwargs):
+    """ Plot the band of a fit function and the data it was fit to.
+
+    Args:
+        ax: A matplotlib axis.
+        result: An `lsqfit.nonlinear_fit`, or anything else with its `fcn`, `p`, `x` and `y`.
+        x:  An array of x-values at which to evaluate the fit function.
+            The default is 200 points spanning the fit's x-values.
+            For a fit without x-values, whose `fcn` takes only the parameters, these label what `fcn` returns.
+        sigma: A list of standard deviations for which to draw a band.
+        data: A dictionary of options accepted by `errorbar` for the data, or False to leave the data out.
+        **kwargs: options accepted by matplotlib's `fill_between` for the band.  The default is alpha=0.2.
+
+    The fit function is only ever evaluated on the means of the parameters.
+    Its derivatives J with respect to the parameters are found by central differences,
+    and the variance of the band is the diagonal of J C Jᵀ, where C is the parameters' covariance,
+    so no gvar is made for any point of the band.
+    """
+    x, center, sdev = _band(result, x)
+
+    with phase('artists'):
+        options = {**defaults, **kwargs}
+        for s in sigma:
+            ax.fill_between(x, center-s*sdev, center+s*sdev, **options)
+            options.pop('label', None)
+
+    has_x = result.x is not False and not hasattr(result.x, 'keys')
+    if data is not False and has_x and not hasattr(result.y, 'keys'):
+        errorbar(ax, result.x, result.y, **{'linestyle': 'none', **(data or {})})
@@ -0,0 +1,230 @@
+import io
+import struct
+import zipfile
+
+import numpy as np
+import gvar as gv
+
+def _load(filename):
+    # The arrays of an .npz file, memory-mapped where they are stored uncompressed, as np.savez does.
+    # np.load ignores mmap_mode for .npz files, so find where each array's data starts in the archive.
+    arrays = {}
+    with zipfile.ZipFile(filename) as archive, open(filename, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(io.BytesIO(archive.read(info)))
+                continue
+
+            # The local file header is 30 bytes, then the file name and an extra field whose lengths end it.
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            if dtype.hasobject or 0 in shape:
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                arrays[name] = np.lib.format.read_array(f, allow_pickle=False)
+                continue
+            arrays[name] = np.memmap(filename, dtype=dtype, mode='r', offset=f.tell(),
+                    shape=shape, order='F' if fortran_order else 'C')
+    return arrays
+
+def _sparse(gvars):
+    # The derivatives of the gvars with respect to the primaries they depend on, as one CSR matrix,
+    # and the covariance of just those primaries, also sparse.
+    import scipy.sparse
+
+    if any(g.cov is not gvars[0].cov for g in gvars):
+        raise ValueError("The gvars do not share one covariance matrix; were some made before gv.switch_gvar?")
+    derivatives = [g.internaldata[1] for g in gvars]
+    columns = [d.indices() for d in derivatives]
+    indptr = np.concatenate(([0], np.cumsum([len(c) for c in columns])))
+    # Number the primaries that appear from 0, so that neither matrix is as wide as every primary ever made.
+    primaries, compact = np.unique(np.concatenate(columns), return_inverse=True)
+    D = scipy.sparse.csr_matrix(
+            (np.concatenate([d.values() for d in derivatives]), compact, indptr),
+            shape=(len(derivatives), len(primaries)))
+
+    # The covariance of the primaries, block by block, from the primary gvars themselves.
+    dependencies = gv.dependencies(gvars, all=True)
+    column = np.searchsorted(primaries, [p.internaldata[1].indices()[0] for p in dependencies])
+    S_rows, S_columns, S_values = [], [], []
+    for block, cov in gv.evalcov_blocks(dependencies):
+        # The blocks come dense; keep only their nonzero entries.
+        row, col = np.nonzero(cov)
+        S_rows.append(column[block][row])
+        S_columns.append(column[block][col])
+        S_values.append(cov[row, col])
+    S = scipy.sparse.csr_matrix((np.concatenate(S_values), (np.concatenate(S_rows), np.concatenate(S_columns))),
+            shape=(len(primaries), len(primaries)))
+    return D, S
+
+class Gaussians:
+    """ Correlated normally-distributed variables held in arrays rather than as gvars.
+
+    Args:
+        mean: A vector of the means.
+        cov: Their covariance matrix.
+        derivatives: Instead of `cov`, the sparse matrix of their derivatives with respect to
+            primary variables, as a scipy sparse matrix or a `(data, indices, indptr)` triple in CSR layout.
+        primary_var: The variances of independent primary variables; the default is one each.
+        primary_cov: Instead of `primary_var`, the sparse covariance matrix of correlated primary variables.
+
+    Derivatives need scipy, which `pip install gvarplot[sparse]` installs; a covariance matrix does not.
+    The arrays may be memory-mapped, as `load` does, or as `np.load(filename, mmap_mode='r')` does for .npy files.
+    Indexing gives the variables at those indices, without reading anything.
+    The plotters accept `Gaussians` wherever they accept an array of gvars and read only what they need:
+    the means, the variances and, for pairs of points, the covariances between them.
+    """
+
+    # How many products of derivatives to hold at once when computing covariances.
+    _chunk = 2**18
+
+    def __init__(self, mean, cov=None, derivatives=None, primary_var=None, primary_cov=None):
+        if (cov is None) == (derivatives is None):
+            raise ValueError("Either a covariance or derivatives are required, but not both.")
+
+        self._mean = mean
+        self._cov = cov
+        self._primary_var = primary_var
+        self._primary_cov = primary_cov
+        self._derivatives = None
+        if derivatives is not None:
+            import scipy.sparse
+            if isinstance(derivatives, tuple):
+                data, indices, indptr = derivatives
+                if primary_cov is not None:
+                    columns = primary_cov.shape[0]
+                elif primary_var is not None:
+                    columns = len(primary_var)
+                else:
+                    columns = int(np.max(indices))+1 if len(indices) else 0
+                derivatives = scipy.sparse.csr_matrix((data, indices, indptr), shape=(len(mean), columns), copy=False)
+            self._derivatives = derivatives.tocsr()
+        self._index = np.arange(len(mean))
+
+    @classmethod
+    def load(cls, filename):
+        """ Memory-map `Gaussians` from an .npz file.
+
+        The file holds `mean` and either `cov` or the CSR arrays `data`, `indices` and `indptr` of the derivatives,
+        optionally with `primary_var` or the CSR arrays `primary_cov_data`, `primary_cov_indices` and `primary_cov_indptr`.
+        `save` and `np.savez` write such files, and the arrays they store are mapped, not read.
+        """
+        arrays = _load(filename)
+        if 'cov' in arrays:
+            return cls(arrays['mean'], cov=arrays['cov'])
+
+        primary_cov = None
+        if 'primary_cov_indptr' in arrays:
+            import scipy.sparse
+            size = len(arrays['primary_cov_indptr']) - 1
+            primary_cov = scipy.sparse.csr_matrix((arrays['primary_cov_data'], arrays['primary_cov_indices'],
+                    arrays['primary_cov_indptr']), shape=(size, size), copy=False)
+        return cls(arrays['mean'], derivatives=(arrays['data'], arrays['indices'], arrays['indptr']),
+                primary_var=arrays.get('primary_var'), primary_cov=primary_cov)
+
+    @classmethod
+    def from_gvars(cls, g):
+        """ Convert gvars to `Gaussians`, with their derivatives as one sparse matrix.
+
+        Args:
+            g:  An array of gvars.
+
+        The conversion visits every gvar once.  Afterwards the variances and covariances of any of them
+        cost sparse products, as much as their nonzero derivatives, and they can be saved and memory-mapped.
+        """
+        g = np.asarray(g).ravel()
+        if g.size == 0:
+            raise ValueError("There are no gvars to convert.")
+        D, S = _sparse(g)
+        return cls(gv.mean(g), derivatives=D, primary_cov=S)
+
+    def save(self, filename):
+        """ Save the selected variables to an .npz file that `load` memory-maps. """
+        i = self._index.ravel()
+        mean = np.asarray(self._mean[i], dtype=float)
+        if self._cov is not None:
+            np.savez(filename, mean=mean, cov=np.asarray(self._cov[np.ix_(i, i)]))
+            return
+
+        D = self._derivatives[i]
+        arrays = dict(mean=mean, data=D.data, indices=D.indices, indptr=D.indptr)
+        if self._primary_cov is not None:
+            S = self._primary_cov.tocsr()
+            arrays.update(primary_cov_data=S.data, primary_cov_indices=S.indices, primary_cov_indptr=S.indptr)
+        elif self._primary_var is not None:
+            arrays.update(primary_var=np.asarray(self._primary_var))
+        np.savez(filename, **arrays)
+
+    def __getitem__(self, key):
+        selected = object.__new__(type(self))
+        selected.__dict__.update(self.__dict__)
+        selected._index = self._index[key]
+        return selected
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def shape(self):
+        return self._index.shape
+
+    @property
+    def size(self):
+        return self._index.size
+
+    @property
+    def mean(self):
+        return np.asarray(self._mean[self._index.ravel()], dtype=float).reshape(self.shape)
+
+    @property
+    def var(self):
+        return self.pair_cov(self)
+
+    @property
+    def sdev(self):
+        return np.sqrt(self.var)
+
+    def pair_cov(self, other):
+        """ The covariance of each variable with the corresponding one of `other`, which must come from the same arrays. """
+        if other._mean is not self._mean:
+            raise ValueError("Covariances are only known between Gaussians from the same arrays.")
+        if self.shape != other.shape:
+            raise ValueError(f"Shapes {self.shape} and {other.shape} do not match.")
+
+        i, j = self._index.ravel(), other._index.ravel()
+        if self._cov is not None:
+            return np.asarray(self._cov[i, j], dtype=float).reshape(self.shape)
+
+        left, right = self._derivatives[i], self._derivatives[j]
+        if self._primary_cov is None:
+            # With independent primaries only the derivatives with respect to the same primary meet.
+            if self._primary_var is not None:
+                left = left.multiply(np.asarray(self._primary_var, dtype=float)[np.newaxis, :]).tocsr()
+            return np.asarray(left.multiply(right).sum(axis=1)).reshape(self.shape)
+
+        # Otherwise cov(i, j) is the sum of d_ia d_jb S_ab over the nonzero derivatives d_ia and d_jb,
+        # so visit every such combination, a chunk of pairs at a time to bound the memory needed.
+        n_left, n_right = np.diff(left.indptr), np.diff(right.indptr)
+        combinations = n_left * n_right
+        starts = np.cumsum(combinations) - combinations
+        cov = np.zeros(len(i))
+        start = 0
+        while start < len(i):
+            stop = max(np.searchsorted(starts, starts[start] + self._chunk, side='left'), start+1)
+            pair = np.repeat(np.arange(start, stop), combinations[start:stop])
+            # Which combination of the pair's derivatives each term is.
+            k = np.arange(starts[start], starts[start] + len(pair)) - starts[pair]
+            a = left.indptr[pair] + k // n_right[pair]
+            b = right.indptr[pair] + k % n_right[pair]
+            S_ab = np.asarray(self._primary_cov[left.indices[a], right.indices[b]]).ravel()
+            terms = left.data[a] * right.data[b] * S_ab
+            cov[start:stop] = np.bincount(pair - start, weights=terms, minlength=stop-start)
+            start = stop
+        return cov.reshape(self.shape)
@@ -0,0 +1,204 @@
+import sys
+
+import gvar as gv
+import numpy as np
+
+from gvarplot._values import values
+from gvarplot.cache import cached
+from gvarplot.covariance import pair_covariance
+from gvarplot.ellipses import _geometry, _from_cov
+from gvarplot.errorband import _envelope, _refined
+from gvarplot.fit import _band
+from gvarplot.sampled import _quantiles, _moments
+
+# Each function here computes what the plotter of the same name draws, from the same code, but draws nothing.
+# The results are tables: NumPy structured arrays with one row per point and one field per column,
+# which `save` writes column by column.
+# Bounds at each sigma have a field for each, like 'lower_2' and 'upper_2' for sigma=2.
+
+def _table(columns):
+    # A structured array with a field for each of the equally long columns.
+    columns = {name: np.ravel(column) for name, column in columns.items()}
+    length = len(next(iter(columns.values()))) if columns else 0
+    table = np.empty(length, dtype=[(name, column.dtype) for name, column in columns.items()])
+    for name, column in columns.items():
+        table[name] = column
+    return table
+
+def _bounds(center, sdev, sigma, prefix=''):
+    columns = {}
+    for s in sigma:
+        columns[f'{prefix}lower_{s:g}'] = center - s*sdev
+        columns[f'{prefix}upper_{s:g}'] = center + s*sdev
+    return columns
+
+def _ellipses(X, Y, var_x, var_y, cov_xy):
+    major, minor, angle = _geometry(var_x, var_y, cov_xy)
+    return {'x': X, 'y': Y, 'var_x': var_x, 'var_y': var_y, 'cov_xy': cov_xy,
+            'major': major, 'minor': minor, 'angle': angle}
+
+def errorband(x, y, sigma=[1,2,3], tolerance=1e-3):
+    """ The band `gvarplot.errorband` draws, with arguments as for it.
+
+    Returns:
+        A table with fields 'x', 'mean', 'sdev' and the band's 'lower_{s}' and 'upper_{s}' edges for each sigma.
+        When both `x` and `y` are gvars, fields 'x', 'y' for the curve and 'dx', 'dy'
+        for the one-sigma offset of the band's upper edge from it, with the edges' points in
+        'upper_x_{s}', 'upper_y_{s}', 'lower_x_{s}' and 'lower_y_{s}';
+        for a single such point, the table of `ellipses`, as its ellipses are drawn instead.
+    """
+    if callable(y):
+        x, y = _refined(x, y, sigma, tolerance)
+    x, y = values(x), values(y)
+
+    if x.is_gvar and y.is_gvar:
+        if x.data.size < 2:
+            return ellipses(x.data, y.data)
+        X, Y = np.ravel(x.mean), np.ravel(y.mean)
+        dX, dY = _envelope(X, Y, *(np.ravel(c) for c in pair_covariance(x, y)))
+        columns = {'x': X, 'y': Y, 'dx': dX, 'dy': dY}
+        for s in sigma:
+            columns.update({f'upper_x_{s:g}': X+s*dX, f'upper_y_{s:g}': Y+s*dY,
+                    f'lower_x_{s:g}': X-s*dX, f'lower_y_{s:g}': Y-s*dY})
+        return _table(columns)
+
+    return _table({'x': x.mean, 'mean': y.mean, 'sdev': y.sdev, **_bounds(np.ravel(y.mean), np.ravel(y.sdev), sigma)})
+
+def errorbar(x, y):
+    """ The points and bars `gvarplot.errorbar` draws: fields 'x', 'y', 'sdev_x' and 'sdev_y'.
+
+    The bars at each sigma reach that many standard deviations either way.
+    """
+    x, y = values(x), values(y)
+    return _table({'x': x.mean, 'y': y.mean, 'sdev_x': x.sdev, 'sdev_y': y.sdev})
+
+def mean(x, y):
+    """ The points `gvarplot.mean` draws: fields 'x' and 'y'. """
+    return _table({'x': values(x).mean, 'y': values(y).mean})
+
+def errorbars(x, y):
+    """ The series `gvarplot.errorbars` and `gvarplot.means` draw, with arguments as for them.
+
+    Returns:
+        A table with the field 'x' and, for each series, 'mean_{label}' and 'sdev_{label}',
+        labelled by the DataFrame's column names or by number.
+    """
+    pd = sys.modules.get('pandas')
+    labels = None
+    if pd is not None and isinstance(y, pd.DataFrame):
+        labels = [str(label) for label in y.columns]
+        if x is None:
+            x = y.index.to_numpy()
+    x, y = values(x), values(y)
+    Y, dY = y.mean.reshape(len(y.data), -1), y.sdev.reshape(len(y.data), -1)
+    labels = labels or [str(k) for k in range(Y.shape[1])]
+
+    columns = {'x': x.mean}
+    for k, label in enumerate(labels):
+        columns[f'mean_{label}'] = Y[:, k]
+        columns[f'sdev_{label}'] = dY[:, k]
+    return _table(columns)
+
+def ellipses(x, y):
+    """ The error ellipses `gvarplot.ellipses` draws, with arguments as for it.
+
+    Returns:
+        A table with fields 'x' and 'y' for the centers, 'var_x', 'var_y' and 'cov_xy' for the covariances,
+        and 'major', 'minor' and 'angle' for the semi-axes and angle, in degrees, of the one-sigma ellipses;
+        the ellipse at each sigma is that many times larger.
+    """
+    x, y = values(x), values(y)
+    var_x, var_y, cov_xy = (np.ravel(v) for v in pair_covariance(x, y))
+    return _table(_ellipses(np.ravel(x.mean), np.ravel(y.mean), var_x, var_y, cov_xy))
+
+def ellipse(x, y):
+    """ The error ellipse `gvarplot.ellipse` draws, as a table of one row like that of `ellipses`. """
+    return ellipses([x], [y])
+
+def ellipses_from_cov(means, covs):
+    """ The error ellipses `gvarplot.ellipses_from_cov` draws, as a table like that of `ellipses`. """
+    return _table(_ellipses(*_from_cov(means, covs)))
+
+def _spans(g, sigma):
+    g = values(g)
+    center, sdev = np.ravel(g.mean), np.ravel(g.sdev)
+    return _table({'center': center, 'sdev': sdev, **_bounds(center, sdev, sigma)})
+
+def vspan(x, sigma=[1]):
+    """ The intervals `gvarplot.vspan` shades: fields 'center', 'sdev', and 'lower_{s}' and 'upper_{s}' for each sigma. """
+    return _spans(x, sigma)
+
+def hspan(y, sigma=[1]):
+    """ The intervals `gvarplot.hspan` shades, as a table like that of `vspan`. """
+    return _spans(y, sigma)
+
+def uncertainty_matrix(gvs, lower=False):
+    """ The error ellipses in the cells of `gvarplot.uncertainty_matrix`.
+
+    Returns:
+        A table with a row for each cell, with fields 'row' and 'column' for its position
+        and the rest like those of `ellipses`, with 'x' for the column's gvar and 'y' for the row's.
+        The diagonal cells' spans are their 'x' ± 'var_x'**0.5 times each sigma.
+        When `gvs` is a dictionary, 'row_label' and 'column_label' hold the keys.
+    """
+    keys = list(gvs) if hasattr(gvs, 'keys') else None
+    if keys is not None:
+        gvs = [gvs[k] for k in keys]
+    gvs = values(gvs)
+    C = cached('evalcov', [gvs.data], lambda: gv.evalcov(gvs.data.flatten()))
+    means = gvs.mean.flatten()
+
+    row, column = np.indices(C.shape)
+    if lower:
+        row, column = row[row >= column], column[row >= column]
+    row, column = row.ravel(), column.ravel()
+
+    var = np.diag(C)
+    columns = {'row': row, 'column': column}
+    if keys is not None:
+        labels = np.array([str(k) for k in keys])
+        columns.update({'row_label': labels[row], 'column_label': labels[column]})
+    columns.update(_ellipses(means[column], means[row], var[column], var[row], C[row, column]))
+    return _table(columns)
+
+def fit(result, x=None, sigma=[1,2,3]):
+    """ The band `gvarplot.fit` draws, with arguments as for it: fields 'x', 'mean', 'sdev',
+    and 'lower_{s}' and 'upper_{s}' for each sigma.
+    """
+    x, center, sdev = _band(result, x)
+    return _table({'x': x, 'mean': center, 'sdev': sdev, **_bounds(center, sdev, sigma)})
+
+def sampled_errorband(x, fcn, p, sigma=[1,2,3], samples=10000, batch=1000, seed=None):
+    """ The band `gvarplot.sampled_errorband` draws, with arguments as for it:
+    fields 'x', and 'lower_{s}' and 'upper_{s}' for each sigma.
+    """
+    x = np.asarray(x, dtype=float)
+    bounds = _quantiles(x, fcn, p, sigma, samples, batch, seed)
+    columns = {'x': x}
+    for s, lo, hi in zip(sigma, bounds[:len(sigma)], bounds[len(sigma):]):
+        columns.update({f'lower_{s:g}': lo, f'upper_{s:g}': hi})
+    return _table(columns)
+
+def sampled_ellipses(fcn, p, samples=10000, batch=1000, seed=None):
+    """ The error ellipses `gvarplot.sampled_ellipses` draws, with arguments as for it, as a table like that of `ellipses`. """
+    return _table(_ellipses(*_moments(fcn, p, samples, batch, seed)))
+
+def save(filename, table):
+    """ Write a table to a file, column by column.
+
+    Args:
+        filename: A compressed NumPy .npz file, with an array for each field,
+            or, if it ends with .parquet, a Parquet file, which needs pandas and pyarrow or fastparquet.
+        table: A table from one of the functions here.
+    """
+    columns = {name: table[name] for name in table.dtype.names}
+    if str(filename).endswith('.parquet'):
+        import pandas as pd
+        pd.DataFrame(columns).to_parquet(filename)
+        return
+    np.savez_compressed(filename, **columns)
+
+def load(filename):
+    """ Read a table written by `save` to an .npz file. """
+    with np.load(filename) as columns:
+        return _table({name: columns[name] for name in columns.files})
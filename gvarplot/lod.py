@@ -0,0 +1,104 @@
+import numpy as np
+
+def _bins(ax, x):
+    # The pixel column of the axis that each x falls in,
+    # with everything left or right of the view lumped into one column on each side.
+    scale = ax.xaxis.get_transform()
+    lo, hi = sorted(scale.transform(np.asarray(ax.get_xlim())))
+    columns = max(int(np.ceil(ax.bbox.width)), 1)
+    position = (scale.transform(x) - lo) / (hi - lo) * columns
+    return np.clip(np.floor(position), -1, columns).astype(int)
+
+def _edges(bins):
+    # The first and last index of each run of equal bins.
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], len(bins)] - 1
+    return starts, ends
+
+def extremes(bins, *ys):
+    """ Indices of the first and last point in each bin, and of the smallest and largest of each of `ys` there. """
+    # Because bins never decreases, sorting by bin and then by y leaves each bin's points where they were,
+    # so the extremes of a bin sit at its first and last position.
+    if len(bins) == 0:
+        return np.array([], dtype=int)
+    starts, ends = _edges(bins)
+    keep = [starts, ends]
+    for y in ys:
+        order = np.lexsort((y, bins))
+        keep += [order[starts], order[ends]]
+    return np.unique(np.concatenate(keep))
+
+def envelope(bins, x, lower, upper):
+    """ Reduce a band to the lowest `lower` and highest `upper` in each bin, held from the bin's first x to its last.
+
+    Returns:
+        The x, lower and upper arrays of the reduced band.
+    """
+    if len(bins) == 0:
+        return x, lower, upper
+    starts, ends = _edges(bins)
+    low = np.minimum.reduceat(lower, starts)
+    high = np.maximum.reduceat(upper, starts)
+    return (np.column_stack((x[starts], x[ends])).flatten(),
+            np.repeat(low, 2), np.repeat(high, 2))
+
+class Colors:
+    """ The colors of the first drawing of each artist, so that redrawing does not take new ones from the property cycle.
+
+    Args:
+        options: The options the artists are drawn with.
+        keys:   The options that set the color; if any is given, the color is left to the options.
+        name:   The option through which to reuse a color.
+    """
+
+    def __init__(self, options, keys=('color', 'c'), name='color'):
+        self.fixed = any(k in options for k in keys)
+        self.name = name
+        self.colors = []
+
+    def style(self, n):
+        """ Options that give the `n`th artist its first color, once it has one. """
+        if self.fixed or n >= len(self.colors):
+            return {}
+        return {self.name: self.colors[n]}
+
+    def record(self, n, color):
+        """ Remember the color of the first drawing of the `n`th artist. """
+        if not self.fixed and n == len(self.colors):
+            self.colors.append(color)
+
+def level_of_detail(ax, x, draw):
+    """ Draw only as many points as the axis has pixels, and redraw them when the x range changes.
+
+    Args:
+        ax:     A matplotlib axis.
+        x:      The increasing x-values of all the points.
+        draw:   A function which takes the pixel column of every point and returns a list of the artists it draws,
+                typically after reducing the data with `extremes` or `envelope`.
+
+    Lines drawn through the `extremes` and bands drawn from the `envelope` look the same as those drawn with all the points,
+    because every pixel column still reaches the same extremes.
+    `draw` should keep the colors of its first artists, with `Colors`, since each redraw makes new ones.
+    """
+    x = np.asarray(x)
+    if np.any(np.diff(x) < 0):
+        raise ValueError("Level of detail requires increasing x.")
+
+    artists = []
+    view = None
+
+    def update(ax):
+        nonlocal view
+        current = (ax.get_xlim(), ax.bbox.width, ax.get_xscale())
+        if current == view:
+            return
+        view = current
+
+        bins = _bins(ax, x)
+        for artist in artists:
+            artist.remove()
+        artists[:] = draw(bins)
+
+    update(ax)
+    # A plain function, unlike a bound method, is kept alive by the callback registry.
+    ax.callbacks.connect('xlim_changed', update)
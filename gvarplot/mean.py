@@ -1,15 +1,20 @@
 
 import numpy as np
-import pandas as pd
-import gvar as gv
 
-def mean(ax, x, y, **kwargs):
+from gvarplot._values import values
+from gvarplot.lod import level_of_detail, extremes, Colors
+from gvarplot.profile import profiled, phase, points
+
+@profiled
+def mean(ax, x, y, lod=False, **kwargs):
     """ Plot central values of gvars.
 
     Args:
         ax: A matplotlib axis.
         x:  An array of gvars indicating x-values.
         y:  An array of corresponding gvars indicating y-values.
+        lod: If True, only draw the points that matter at the axis' resolution, and redraw them when the x range changes.
+             Requires increasing x.
         **kwargs:  options accepted by matplotlib's `plot`. 
     """
     defaults = {
@@ -17,21 +22,20 @@ def mean(ax, x, y, **kwargs):
     }
     defaults.update(kwargs)
 
-    if isinstance(x, pd.Series):
-        mean(ax, np.array(x), y, **kwargs)
+    with phase('values'):
+        X, Y = values(x).mean, values(y).mean
+    points(np.size(Y))
+
+    if lod:
+        colors = Colors(defaults)
+        def draw(bins):
+            k = extremes(bins, Y)
+            lines = ax.plot(X[k], Y[k], **defaults, **colors.style(0))
+            colors.record(0, lines[0].get_color())
+            return lines
+        with phase('artists'):
+            level_of_detail(ax, X, draw)
         return
-    elif isinstance(x[0], gv._gvarcore.GVar):
-        X = gv.mean(x)
-    else:
-        X = x
-
-    if isinstance(y, pd.Series):
-        mean(ax, X, np.array(y), **kwargs)
-    elif isinstance(y[0], gv._gvarcore.GVar):
-        Y = gv.mean(y)
-    else:
-        Y = y
-
-    ax.plot(X, Y, **kwargs)
-
 
+    with phase('artists'):
+        ax.plot(X, Y, **defaults)
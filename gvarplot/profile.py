@@ -0,0 +1,140 @@
+import contextlib
+import functools
+import time
+
+# The profiles in use, innermost last.
+_active = []
+# The record of the outermost plotting call in progress, if it is being profiled,
+# followed by None while one of its phases is being timed.
+_current = []
+
+# What `phase` hands out when nothing is being recorded; it can be entered any number of times.
+_nothing = contextlib.nullcontext()
+
+def _artists(ax):
+    return len(ax.get_children())
+
+def profiled(function):
+    """ Record the calls of a plotting function while a `Profile` is active.
+
+    Calls from inside another profiled call are part of that call's record,
+    so that uncertainty_matrix's spans, for example, count toward uncertainty_matrix.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _active or _current:
+            return function(*args, **kwargs)
+
+        ax = args[0] if args and hasattr(args[0], 'get_children') else None
+        before = _artists(ax) if ax is not None else 0
+        record = {'function': function.__name__, 'time': 0., 'points': None, 'artists': 0, 'phases': {}}
+        _current.append(record)
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            record['time'] = time.perf_counter() - start
+            _current.pop()
+
+        if ax is not None:
+            record['artists'] = _artists(ax) - before
+        elif isinstance(result, tuple) and hasattr(result[0], 'axes'):
+            # A new figure, like uncertainty_matrix's.
+            record['artists'] = sum(_artists(a) for a in result[0].axes)
+
+        for profile in _active:
+            profile._add(record)
+        return result
+    return wrapper
+
+@contextlib.contextmanager
+def _timed(name):
+    record = _current[-1]
+    _current.append(None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['phases'][name] = record['phases'].get(name, 0.) + time.perf_counter() - start
+        _current.pop()
+
+def phase(name):
+    """ A context manager that adds the time spent in it to the `name` phase of the call being profiled, if any.
+
+    Phases inside another phase, as when uncertainty_matrix draws spans, count toward the outer one.
+    """
+    if not _current or _current[-1] is None:
+        return _nothing
+    return _timed(name)
+
+def points(n):
+    """ Note how many points the call being profiled plots, unless an outer call already has. """
+    if _current and _current[0]['points'] is None:
+        _current[0]['points'] = n
+
+class Profile:
+    """ Record where the time goes in gvarplot calls.
+
+    Args:
+        log: A function called with the record of each call as it finishes, if any.
+
+    Use as a context manager; while active, each call of a plotting function is recorded as a dictionary with its
+    `function` name, total `time`, number of `points` plotted, number of `artists` added, and the time of its `phases`:
+    'values' extracts means and standard deviations,
+    'covariance' extracts covariances,
+    'geometry' computes the shapes of ellipses and bands,
+    'samples' draws and evaluates the random samples of the sampled plotters, or evaluates the function given to errorband,
+    and 'artists' builds the matplotlib artists.
+    Drawing happens later, so time it with `draw`::
+
+        with gvarplot.Profile() as profile:
+            gvarplot.ellipses(ax, x, y)
+            gvarplot.errorband(ax, x, y)
+            profile.draw(fig)
+        print(profile.report())
+
+    When no profile is active the plotting functions skip all of this.
+    """
+
+    def __init__(self, log=None):
+        self.log = log
+        self.records = []
+
+    def __enter__(self):
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exception):
+        _active.remove(self)
+
+    def _add(self, record):
+        self.records.append(record)
+        if self.log is not None:
+            self.log(record)
+
+    def draw(self, figure):
+        """ Draw `figure` and record how long it took. """
+        start = time.perf_counter()
+        figure.canvas.draw()
+        elapsed = time.perf_counter() - start
+        self._add({'function': 'draw', 'time': elapsed, 'points': None, 'artists': 0, 'phases': {'draw': elapsed}})
+
+    def report(self):
+        """ A table of the calls, time, points, artists and time in each phase, totalled by function. """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['function'], {'calls': 0, 'time': 0., 'points': 0, 'artists': 0, 'phases': {}})
+            total['calls'] += 1
+            total['time'] += record['time']
+            total['points'] += record['points'] or 0
+            total['artists'] += record['artists']
+            for name, seconds in record['phases'].items():
+                total['phases'][name] = total['phases'].get(name, 0.) + seconds
+
+        phases = list(dict.fromkeys(name for total in totals.values() for name in total['phases']))
+        lines = [f"{'function':<20} {'calls':>6} {'time [s]':>10} {'points':>10} {'artists':>8}"
+                + ''.join(f" {name + ' [s]':>16}" for name in phases)]
+        for function, total in totals.items():
+            lines.append(f"{function:<20} {total['calls']:>6} {total['time']:>10.4f} {total['points']:>10} {total['artists']:>8}"
+                + ''.join(f" {total['phases'].get(name, 0.):>16.4f}" for name in phases))
+        return '\n'.join(lines)
@@ -0,0 +1,90 @@
+import numpy as np
+
+def _interpolate(rank, centers, heights):
+    # Interpolate each row of heights, placed at the increasing ranks in the same row of centers, to the ranks in rank.
+    rows, m = centers.shape
+    if m == 1:
+        return np.repeat(heights, len(rank), axis=1)
+    order = np.argsort(rank)
+    rank = rank[order]
+
+    # How many of each row's centers are at or below each rank: the ranks are shared, and few,
+    # so each center is looked up among them, and the counts in each row are accumulated.
+    position = np.searchsorted(rank, centers, side='left') + (len(rank)+1)*np.arange(rows)[:, np.newaxis]
+    counts = np.bincount(position.ravel(), minlength=rows*(len(rank)+1)).reshape(rows, -1).cumsum(axis=1)[:, :len(rank)]
+    # Indices into the flattened rows, of the last center at or below each rank.
+    i = m*np.arange(rows)[:, np.newaxis] + np.clip(counts - 1, 0, m-2)
+
+    centers, heights = centers.ravel(), heights.ravel()
+    below, above = centers[i], centers[i+1]
+    low, high = heights[i], heights[i+1]
+    # Beyond the first and last centers, hold the end heights.
+    fraction = np.clip((rank - below) / (above - below), 0, 1)
+    interpolated = np.empty_like(fraction)
+    interpolated[:, order] = low + fraction * (high - low)
+    return interpolated
+
+class Quantiles:
+    """ Estimate quantiles of a stream of observations without keeping them.
+
+    Args:
+        probabilities: A list of the probabilities whose quantiles are wanted.
+        shape: The shape of each observation; every element gets its own estimates.
+        size: How many points summarize the observations of each element.
+
+    Each element keeps a sorted summary of at most `size` weighted points.
+    A batch of observations is merged into it whole, with one sort for all the elements,
+    and the result is squeezed back to at most `size` points, each standing for a run of ranks, shortest in the tails.
+    Until more than `size` observations have arrived the summary holds them all,
+    and the estimates are exactly those of `np.quantile`; after that, the memory needed stops growing.
+    """
+
+    def __init__(self, probabilities, shape=(), size=1024):
+        self.probabilities = np.asarray(probabilities, dtype=float)
+        self.shape = tuple(shape)
+        self.size = size
+        self.count = 0
+        # One row for each element.
+        rows = int(np.prod(self.shape, dtype=int))
+        self._heights = np.zeros((rows, 0))
+        self._weights = np.zeros((rows, 0))
+
+    @staticmethod
+    def _centers(weights):
+        # The middle rank of the run of order statistics each point stands for, counting from 0.
+        return np.cumsum(weights, axis=1) - (weights + 1) / 2
+
+    def add(self, observations):
+        """ Add a batch of observations, given with the observation index last. """
+        observations = np.asarray(observations, dtype=float)
+        n = observations.shape[-1]
+        if n == 0:
+            return
+        observations = observations.reshape(len(self._heights), n)
+
+        # The summary is sorted already, and a stable sort merges two sorted runs quickly.
+        heights = np.concatenate((self._heights, np.sort(observations, axis=1)), axis=1)
+        weights = np.concatenate((self._weights, np.ones_like(observations)), axis=1)
+        order = (np.argsort(heights, axis=1, kind='stable') + heights.shape[1]*np.arange(len(heights))[:, np.newaxis]).ravel()
+        heights, weights = heights.ravel()[order].reshape(heights.shape), weights.ravel()[order].reshape(heights.shape)
+        self.count += n
+
+        if heights.shape[1] > self.size:
+            # Each new point stands for a run of whole ranks and sits at its middle.
+            # As in the t-digest (Dunning and Ertl 2019), the runs are shortest in the tails, where the quantiles
+            # of the widest bands are and the heights change fastest; there each point is a single observation.
+            edges = np.unique(np.round(self.count * (1 - np.cos(np.pi * np.arange(self.size+1) / self.size)) / 2))
+            runs = np.diff(edges)
+            heights = _interpolate(edges[:-1] + (runs - 1) / 2, self._centers(weights), heights)
+            weights = np.broadcast_to(runs, heights.shape)
+        self._heights, self._weights = heights, weights
+
+    @property
+    def estimates(self):
+        """ The current estimate of each quantile, with the probability index first. """
+        if self.count == 0:
+            raise ValueError("No observations have been added.")
+        # Like np.quantile's default, the quantile with probability p is at rank p*(count-1).
+        rank = self.probabilities.ravel() * (self.count - 1)
+        estimates = _interpolate(rank, self._centers(self._weights), self._heights)
+        return np.moveaxis(estimates, -1, 0).reshape(self.probabilities.shape + self.shape)
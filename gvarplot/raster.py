@@ -0,0 +1,80 @@
+import numpy as np
+
+def density(x, y, var_x, var_y, cov_xy, extent, shape, reach=3, chunk=2**20):
+    """ Add up the bivariate normal densities of many points on a grid of pixels.
+
+    Args:
+        x, y:   The centers of the densities.
+        var_x, var_y, cov_xy: Their 2x2 covariance blocks.
+        extent: The (left, right, bottom, top) of the grid in data coordinates.
+        shape:  The (rows, columns) of the grid.
+        reach:  How many standard deviations out to spread each density.
+        chunk:  How many pixel values to compute at a time, which bounds the memory needed.
+
+    Returns:
+        An array of the given shape, with row 0 at the bottom, holding the expected number of points in each pixel.
+
+    Each point is spread over the pixels within `reach` standard deviations, so the cost is the total of those footprints.
+    A point's density is widened by a pixel's own width, so that even points much smaller than a pixel count in full.
+    """
+    left, right, bottom, top = extent
+    rows, columns = shape
+    x, y, var_x, var_y, cov_xy = (np.ravel(a).astype(float) for a in (x, y, var_x, var_y, cov_xy))
+
+    # In pixel units, a uniform pixel has variance 1/12 along each axis.
+    scale_x, scale_y = columns / (right - left), rows / (top - bottom)
+    u, v = (x - left) * scale_x, (y - bottom) * scale_y
+    a = var_x * scale_x**2 + 1/12
+    c = var_y * scale_y**2 + 1/12
+    b = cov_xy * scale_x * scale_y
+    det = a*c - b*b
+
+    # The box of pixels around each point, skipping points whose box misses the grid entirely.
+    half_width, half_height = np.ceil(reach*np.sqrt(a)).astype(int), np.ceil(reach*np.sqrt(c)).astype(int)
+    first_column = np.floor(u).astype(int) - half_width
+    first_row = np.floor(v).astype(int) - half_height
+    width, height = 2*half_width + 1, 2*half_height + 1
+    seen = ((first_column < columns) & (first_column + width > 0) &
+            (first_row < rows) & (first_row + height > 0))
+    u, v, a, b, c, det = u[seen], v[seen], a[seen], b[seen], c[seen], det[seen]
+    first_column, first_row, width, height = first_column[seen], first_row[seen], width[seen], height[seen]
+
+    # Points whose boxes are the same size are spread together, as many at a time as fit in a chunk.
+    image = np.zeros(rows * columns)
+    sizes, group = np.unique(np.column_stack((height, width)), axis=0, return_inverse=True)
+    for g, (h, w) in enumerate(sizes):
+        members = np.flatnonzero(group.ravel() == g)
+        step = max(chunk // (h*w), 1)
+        for start in range(0, len(members), step):
+            i = members[start:start+step]
+            column = first_column[i, np.newaxis] + np.arange(w)
+            row = first_row[i, np.newaxis] + np.arange(h)
+            du = (column + 0.5 - u[i, np.newaxis])[:, np.newaxis, :]
+            dv = (row + 0.5 - v[i, np.newaxis])[:, :, np.newaxis]
+            A, B, C, D = (q[i, np.newaxis, np.newaxis] for q in (a, b, c, det))
+            weight = np.exp(-(C*du*du - 2*B*du*dv + A*dv*dv) / (2*D))
+            # Each point's weights sum to one over its whole box, including any part off the grid.
+            weight /= weight.sum(axis=(1, 2), keepdims=True)
+
+            inside = ((column >= 0) & (column < columns))[:, np.newaxis, :] & ((row >= 0) & (row < rows))[:, :, np.newaxis]
+            pixel = row[:, :, np.newaxis]*columns + column[:, np.newaxis, :]
+            image += np.bincount(pixel[inside], weights=weight[inside], minlength=rows*columns)
+
+    return image.reshape(rows, columns)
+
+def levels(image, sigma, total):
+    """ The densities of the contours that enclose the same fraction of the points as a bivariate normal's sigma ellipses.
+
+    Args:
+        image:  A `density`.
+        sigma:  A list of standard deviations.
+        total:  The number of points, including the part of them that falls off the image.
+
+    The contour for each sigma surrounds the densest pixels, which together hold that fraction of the total;
+    for a single point it is the point's error ellipse.
+    """
+    ordered = np.sort(image, axis=None)[::-1]
+    enclosed = np.cumsum(ordered)
+    fractions = 1 - np.exp(-np.square(sigma) / 2)
+    k = np.minimum(np.searchsorted(enclosed, fractions * total), len(ordered) - 1)
+    return np.unique(ordered[k])
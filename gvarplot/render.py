@@ -0,0 +1,69 @@
+import concurrent.futures
+import os
+
+import gvar as gv
+
+def _summarize(fit):
+    # Only the means and covariance of the gvars matter for plotting,
+    # and unlike the gvars themselves they are cheap to send to another process.
+    gvs = fit.p if hasattr(fit, 'p') else fit
+    if hasattr(gvs, 'keys'):
+        gvs = gv.BufferDict(gvs)
+        return gv.mean(gvs), gv.evalcov(gvs.buf)
+    return gv.mean(gvs), gv.evalcov(gvs)
+
+def _restore(mean, cov):
+    if isinstance(mean, gv.BufferDict):
+        return gv.BufferDict(mean, buf=gv.gvar(mean.buf, cov))
+    return gv.gvar(mean, cov)
+
+def _use_agg():
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _render(job):
+    import matplotlib.pyplot as plt
+
+    plot, filename, mean, cov, kwargs = job
+    figure = plot(_restore(mean, cov), **kwargs)
+    if isinstance(figure, tuple):
+        figure = figure[0]
+    figure.savefig(filename)
+    # Nothing should outlive its file.
+    plt.close(figure)
+    return filename
+
+def render(fits, filenames, plot=None, processes=None, **kwargs):
+    """ Plot each of many fits and save the figures to files, in parallel.
+
+    Args:
+        fits:       A list of lsqfit fits, whose parameters `p` are plotted,
+                    or of dictionaries, BufferDicts or arrays of gvars.
+        filenames:  A corresponding list of files to save the figures in.
+        plot:       A function that takes the gvars of one fit and returns a figure, or a tuple that starts with one.
+                    It must be defined at the top level of a module so that the worker processes can find it.
+                    The default is `uncertainty_matrix`.
+        processes:  The number of worker processes; the default is one per CPU.
+                    With 1, the figures are made one after the other in this process.
+        **kwargs:   options passed to `plot`.
+
+    Returns:
+        The list of files written.
+
+    The means and covariance of each fit are computed once, here, and the workers rebuild equivalent gvars from them,
+    so the figures are the same as those made by calling `plot` directly.
+    The workers draw with matplotlib's Agg backend and close each figure as soon as it is saved.
+    """
+    if plot is None:
+        from gvarplot import uncertainty_matrix as plot
+
+    filenames = list(filenames)
+    summaries = (_summarize(fit) for fit in fits)
+    jobs = ((plot, filename, mean, cov, kwargs) for filename, (mean, cov) in zip(filenames, summaries))
+
+    if processes == 1:
+        return [_render(job) for job in jobs]
+
+    processes = processes or os.cpu_count()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_use_agg) as pool:
+        return list(pool.map(_render, jobs))
@@ -0,0 +1,136 @@
+import math
+
+import gvar as gv
+import numpy as np
+
+from gvarplot._values import values
+from gvarplot.cache import cached
+from gvarplot.quantile import Quantiles
+from gvarplot.ellipses import _geometry, _draw, _limits
+from gvarplot.profile import profiled, phase, points
+
+defaults = {
+        'alpha': 0.2,
+        }
+
+def _below(s):
+    # The probability that a normal variable falls below s standard deviations from its mean.
+    return (1 + math.erf(s / math.sqrt(2))) / 2
+
+def _batches(p, samples, batch, seed):
+    # Correlated samples of the gvars in p, `batch` at a time, each parameter with the sample index last.
+    v = values(p)
+    mean = np.ravel(v.mean)
+    cov = cached('evalcov', [v.data], lambda: gv.evalcov(v.data.flatten()))
+    # The covariance of fit parameters is often singular, so use its eigenvectors rather than a Cholesky factor.
+    w, U = np.linalg.eigh(np.atleast_2d(cov))
+    root = U * np.sqrt(np.clip(w, 0, None))
+
+    rng = np.random.default_rng(seed)
+    layout = gv.BufferDict(p) if hasattr(p, 'keys') else None
+    for start in range(0, samples, batch):
+        n = min(batch, samples - start)
+        draws = mean[:, np.newaxis] + root @ rng.standard_normal((len(mean), n))
+        if layout is None:
+            yield draws.reshape(np.shape(v.data) + (n,))
+            continue
+        # A BufferDict, so that a function reading p['E'] from a prior on 'log(E)' finds it.
+        yield gv.BufferDict(layout, rbatch_buf=draws)
+
+def _quantiles(x, fcn, p, sigma, samples, batch, seed):
+    # The lower bounds for each sigma, followed by the upper bounds, each with the shape of x.
+    quantiles = Quantiles([_below(-s) for s in sigma] + [_below(s) for s in sigma], x.shape)
+    with phase('samples'):
+        for sample in _batches(p, samples, batch, seed):
+            f = fcn(x[..., np.newaxis], sample)
+            quantiles.add(np.broadcast_to(f, x.shape + np.shape(f)[-1:]))
+        return quantiles.estimates
+
+def _moments(fcn, p, samples, batch, seed):
+    # The means, variances and covariance of the points fcn returns, over the samples.
+    with phase('samples'):
+        count = 0
+        for sample in _batches(p, samples, batch, seed):
+            X, Y = (np.asarray(f, dtype=float) for f in fcn(sample))
+            X, Y = np.broadcast_arrays(X, Y)
+            X, Y = X.reshape(-1, X.shape[-1]), Y.reshape(-1, Y.shape[-1])
+            n = X.shape[-1]
+
+            # Combine the batch's moments with those so far (Chan, Golub and LeVeque 1979).
+            batch_x, batch_y = X.mean(axis=-1), Y.mean(axis=-1)
+            dX, dY = X - batch_x[:, np.newaxis], Y - batch_y[:, np.newaxis]
+            batch_xx, batch_yy, batch_xy = (dX*dX).sum(axis=-1), (dY*dY).sum(axis=-1), (dX*dY).sum(axis=-1)
+            if count == 0:
+                mean_x, mean_y, xx, yy, xy = batch_x, batch_y, batch_xx, batch_yy, batch_xy
+            else:
+                shift_x, shift_y = batch_x - mean_x, batch_y - mean_y
+                weight = count * n / (count + n)
+                mean_x = mean_x + shift_x * n / (count + n)
+                mean_y = mean_y + shift_y * n / (count + n)
+                xx = xx + batch_xx + shift_x*shift_x*weight
+                yy = yy + batch_yy + shift_y*shift_y*weight
+                xy = xy + batch_xy + shift_x*shift_y*weight
+            count += n
+
+    if count < 2:
+        raise ValueError("At least two samples are needed for a covariance.")
+    return mean_x, mean_y, xx/(count-1), yy/(count-1), xy/(count-1)
+
+@profiled
+def sampled_errorband(ax, x, fcn, p, sigma=[1,2,3], samples=10000, batch=1000, seed=None, **kwargs):
+    """ Plot a band around a nonlinear function of gvars, from quantiles of random samples.
+
+    Args:
+        ax: A matplotlib axis.
+        x:  An array of x-values.
+        fcn: A function `fcn(x, p)`, as for an lsqfit fit, that works on a whole batch of samples at once.
+            It gets `x` as a column, `x[:, np.newaxis]`, and the parameters with the sample index last,
+            so that a function written for single values, like `p['a'] * np.exp(-p['E'] * x)`,
+            returns an array with one row per x-value and one column per sample.
+        p:  The gvars, an array or dictionary, to sample.
+        sigma: A list of standard deviations for which to draw a band;
+            each band spans the quantiles a normal distribution has at ± that many standard deviations.
+        samples: How many samples to draw.
+        batch: How many samples to draw and evaluate at a time.
+        seed: A seed for the random samples.
+        **kwargs: options accepted by matplotlib's `fill_between`.  The default is alpha=0.2.
+
+    Unlike `errorband`, which propagates uncertainties linearly, the band follows the actual spread of `fcn`.
+    The quantiles are estimated as the samples stream past, so only one batch is ever held in memory.
+    """
+    x = np.asarray(x, dtype=float)
+    points(x.size)
+    bounds = _quantiles(x, fcn, p, sigma, samples, batch, seed)
+
+    with phase('artists'):
+        options = {**defaults, **kwargs}
+        for lower, upper in zip(bounds[:len(sigma)], bounds[len(sigma):]):
+            ax.fill_between(x, lower, upper, **options)
+            options.pop('label', None)
+
+@profiled
+def sampled_ellipses(ax, fcn, p, sigma=[1], samples=10000, batch=1000, seed=None, **kwargs):
+    """ Plot error ellipses around nonlinear functions of gvars, from the moments of random samples.
+
+    Args:
+        ax: A matplotlib axis.
+        fcn: A function `fcn(p)` that returns a pair of arrays `(x, y)` of the points on which to center ellipses.
+            It gets the parameters with the sample index last, and should return `x` and `y` with the sample index last too.
+        p:  The gvars, an array or dictionary, to sample.
+        sigma: A list of standard deviations for which to draw an ellipse for each point.
+        samples: How many samples to draw.
+        batch: How many samples to draw and evaluate at a time.
+        seed: A seed for the random samples.
+        **kwargs: options accepted by `matplotlib.collections.EllipseCollection`.  The default is alpha=0.2.
+
+    The ellipses are centered on the sample means and shaped by the sample covariances,
+    which are accumulated batch by batch so that only one batch is ever held in memory.
+    """
+    mean_x, mean_y, var_x, var_y, cov_xy = _moments(fcn, p, samples, batch, seed)
+    points(np.size(mean_x))
+    with phase('geometry'):
+        major, minor, angle = _geometry(var_x, var_y, cov_xy)
+
+    with phase('artists'):
+        _draw(ax, mean_x, mean_y, major, minor, angle, sigma, **{**defaults, **kwargs})
+        _limits(ax, mean_x, mean_y, var_x, var_y, sigma)
@@ -0,0 +1,134 @@
+import sys
+
+import numpy as np
+import matplotlib
+import matplotlib.collections as collections
+import matplotlib.colors as mcolors
+import matplotlib.lines as mlines
+import matplotlib.path as mpath
+
+from gvarplot._values import values
+from gvarplot.profile import profiled, phase, points
+
+def _columns(ax, x, y):
+    # The shared x-values, converted to numbers once, y, which has one row per x-value and, unless there is
+    # only one series, one column per series, and the series' labels: a DataFrame's column names, or else None.
+    # The Values may be shared through a Cache, so they are not reshaped here.
+    pd = sys.modules.get('pandas')
+    labels = None
+    if pd is not None and isinstance(y, pd.DataFrame):
+        labels = [str(label) for label in y.columns]
+    if x is None:
+        if labels is None:
+            raise ValueError("x can only be left out when y is a DataFrame, whose index is used instead.")
+        x = y.index.to_numpy()
+    x, y = values(x), values(y)
+    if y.data.ndim not in (1, 2) or x.data.ndim != 1 or len(y.data) != len(x.data):
+        raise ValueError(f"y must have one row for each x-value, not shape {y.data.shape} for {x.data.shape} x-values.")
+
+    # Dates and such become numbers just as ax.plot would make them.
+    ax.xaxis.update_units(x.mean)
+    X = np.asarray(ax.convert_xunits(x.mean), dtype=float)
+    return x, X, y, labels
+
+def _colors(n, color):
+    # One color for each series: the given color or colors, or else the property cycle's, repeated as needed.
+    if color is None:
+        color = matplotlib.rcParams['axes.prop_cycle'].by_key().get('color', ['C0'])
+    rgba = mcolors.to_rgba_array(color)
+    return rgba[np.arange(n) % len(rgba)]
+
+def _lines(ax, X, Y, colors, **kwargs):
+    # The series, one line each, in one collection.
+    lines = collections.LineCollection(np.stack(np.broadcast_arrays(X[:, np.newaxis], Y), axis=-1).transpose(1, 0, 2),
+            colors=colors, **kwargs)
+    ax.add_collection(lines)
+    return lines
+
+def _legend(ax, labels, colors):
+    # A collection has one legend entry at most, so each series gets an empty line of its color to carry its label.
+    if labels is None:
+        return
+    for label, color in zip(labels, colors):
+        ax.add_line(mlines.Line2D([], [], color=color, label=label))
+
+@profiled
+def means(ax, x, y, color=None, labels=None, **kwargs):
+    """ Plot the central values of many series of gvars which share their x-values, such as the columns of a DataFrame.
+
+    Args:
+        ax: A matplotlib axis.
+        x:  An array of x-values, numbers or gvars, shared by all the series; or None for the index of a DataFrame `y`.
+        y:  A DataFrame, or a 2D array, with one column of gvars for each series.
+        color: A color, or a list of colors for the series in turn.  The default is the axes' property cycle.
+        labels: A label for each series, for the legend.  The default is a DataFrame's column names,
+            unless a single `label` for them all is given.
+        **kwargs: options accepted by matplotlib's `LineCollection`.
+
+    Every series is a line in one `LineCollection`, so that many series cost about as much as one long one.
+    """
+    with phase('values'):
+        x, X, y, columns = _columns(ax, x, y)
+        Y = np.reshape(y.mean, (len(X), -1))
+    points(y.data.size)
+    colors = _colors(Y.shape[1], color)
+    if labels is None and 'label' not in kwargs:
+        labels = columns
+
+    with phase('artists'):
+        _lines(ax, X, Y, colors, **kwargs)
+        _legend(ax, labels, colors)
+        ax.autoscale_view()
+
+@profiled
+def errorbars(ax, x, y, sigma=[1], color=None, connect=True, labels=None, **kwargs):
+    """ Plot error bars for many series of gvars which share their x-values, such as the columns of a DataFrame.
+
+    Args:
+        ax: A matplotlib axis.
+        x:  An array of x-values, numbers or gvars, shared by all the series; or None for the index of a DataFrame `y`.
+        y:  A DataFrame, or a 2D array, with one column of gvars for each series.
+        sigma: A list of standard deviations for which to draw bars.
+        color: A color, or a list of colors for the series in turn.  The default is the axes' property cycle.
+        connect: Whether to join each series' central values with a line, as `errorbar` does by default.
+        labels: A label for each series, for the legend.  The default is a DataFrame's column names,
+            unless a single `label` for them all is given.
+        **kwargs: options accepted by matplotlib's `Collection`.
+
+    The means and standard deviations of all the series are extracted together, and the x-values converted once.
+    Rather than the three artists per series that `errorbar` makes, all the series' bars for each sigma are one collection,
+    holding one path per series, so that hundreds of series of many points draw in seconds.
+    """
+    with phase('values'):
+        x, X, y, columns = _columns(ax, x, y)
+        Y, dY = np.reshape(y.mean, (len(X), -1)), np.reshape(y.sdev, (len(X), -1))
+        dX = x.sdev if x.is_gvar else None
+    points(y.data.size)
+    colors = _colors(Y.shape[1], color)
+    if labels is None and 'label' not in kwargs:
+        labels = columns
+
+    with phase('geometry'):
+        # Each bar is a move to one end and a line to the other, so one path holds all of a series' bars.
+        X, Y = np.broadcast_arrays(X[:, np.newaxis], Y)
+        bars = 2 * (1 if dX is None else 2)
+        codes = np.tile([mpath.Path.MOVETO, mpath.Path.LINETO], bars//2 * len(X))
+        paths = []
+        for s in sigma:
+            ends = [(X, Y - s*dY), (X, Y + s*dY)]
+            if dX is not None:
+                ends += [(X - s*dX[:, np.newaxis], Y), (X + s*dX[:, np.newaxis], Y)]
+            # Indexed by series, point, end and coordinate.
+            vertices = np.stack([np.stack(end, axis=-1) for end in ends], axis=1).transpose(2, 0, 1, 3)
+            paths.append([mpath.Path(v.reshape(-1, 2), codes) for v in vertices])
+
+    with phase('artists'):
+        options = dict(kwargs)
+        if connect:
+            _lines(ax, X[:, 0], Y, colors, **options)
+            options.pop('label', None)
+        for p in paths:
+            ax.add_collection(collections.PathCollection(p, facecolors='none', edgecolors=colors, **options))
+            options.pop('label', None)
+        _legend(ax, labels, colors)
+        ax.autoscale_view()
@@ -1,25 +1,67 @@
-#!/usr/bin/env python3
+import numpy as np
+import matplotlib.collections as collections
 
-import gvar as gv
-import matplotlib.pyplot as plt
+from gvarplot._values import values
+from gvarplot.profile import profiled, phase, points
 
 defaults = {
         'alpha': 0.2,
         }
 
+def _corners(center, sdev, s, vertical):
+    # Each span runs all the way across the axis, from 0 to 1 in axis coordinates.
+    across = np.array([0., 1., 1., 0.])
+    lo, hi = center-s*sdev, center+s*sdev
+    along = np.column_stack((lo, lo, hi, hi))
+    corners = np.stack((along, np.broadcast_to(across, along.shape)), axis=-1)
+    return corners if vertical else corners[..., ::-1]
+
+def _spans(ax, g, sigma, transform, vertical, **kwargs):
+    g = values(g)
+    points(g.data.size)
+    with phase('values'):
+        center, sdev = np.ravel(g.mean), np.ravel(g.sdev)
+
+    with phase('artists'):
+        for s in sigma:
+            corners = _corners(center, sdev, s, vertical)
+            ax.add_collection(collections.PolyCollection(corners, transform=transform, **{**defaults, **kwargs}), autolim=False)
+            if 'label' in kwargs:
+                del kwargs['label']
+
+        # Like axvspan and axhspan, only stretch the data limits along the spans' direction.
+        reach = center[:, np.newaxis] + max(sigma, default=0)*np.column_stack((-sdev, sdev))
+        if vertical:
+            ax.update_datalim(np.column_stack((reach.ravel(), np.zeros(reach.size))), updatey=False)
+            ax.autoscale_view(scaley=False)
+        else:
+            ax.update_datalim(np.column_stack((np.zeros(reach.size), reach.ravel())), updatex=False)
+            ax.autoscale_view(scalex=False)
+
+@profiled
 def vspan(ax, x, sigma=[1], **kwargs):
-    if not sigma:
-        return
-    ax.axvspan(x.mean-sigma[0]*x.sdev, x.mean+sigma[0]*x.sdev, **{**defaults,**kwargs})
-    if 'label' in kwargs:
-        del kwargs['label']
-    vspan(ax, x, sigma[1:], **kwargs)
+    """ Shade vertical bands around x-values.
 
+    Args:
+        ax: A matplotlib axis.
+        x:  A gvar, or an array of gvars.
+        sigma: A list of standard deviations for which to shade a band.
+        **kwargs: options accepted by `matplotlib.collections.PolyCollection`.  The default is alpha=0.2.
+
+    The bands of every gvar at each sigma are drawn as a single PolyCollection.
+    """
+    _spans(ax, x, sigma, ax.get_xaxis_transform(), True, **kwargs)
+
+@profiled
 def hspan(ax, y, sigma=[1], **kwargs):
-    if not sigma:
-        return
-    ax.axhspan(y.mean-sigma[0]*y.sdev, y.mean+sigma[0]*y.sdev, **{**defaults,**kwargs})
-    if 'label' in kwargs:
-        del kwargs['label']
-    hspan(ax, y, sigma[1:], **kwargs)
+    """ Shade horizontal bands around y-values.
+
+    Args:
+        ax: A matplotlib axis.
+        y:  A gvar, or an array of gvars.
+        sigma: A list of standard deviations for which to shade a band.
+        **kwargs: options accepted by `matplotlib.collections.PolyCollection`.  The default is alpha=0.2.
 
+    The bands of every gvar at each sigma are drawn as a single PolyCollection.
+    """
+    _spans(ax, y, sigma, ax.get_yaxis_transform(), False, **kwargs)
@@ -1,26 +1,183 @@
 #!/usr/bin/env python3
 
 import gvar as gv
-import matplotlib.pyplot as plt
-from gvarplot import ellipse, mean, hspan, vspan
+import numpy as np
+from gvarplot import hspan, vspan
+from gvarplot._values import values
+from gvarplot.cache import cached
+from gvarplot.ellipses import _geometry, _draw
+from gvarplot.profile import profiled, phase, points
+from gvarplot.span import _corners
 
-def uncertainty_matrix(gvs, labels=None, sigma=[1,2,3], **kwargs):
+def _grid(plt, N, lower):
+    # Like plt.subplots(N, N, sharex='col', sharey='row', squeeze=False),
+    # but the cells above the diagonal are not even created when only the lower triangle is wanted.
+    fig = plt.figure()
+    grid = fig.add_gridspec(N, N)
+    ax = np.full((N, N), None, dtype=object)
+    for j in range(N):
+        for i in range(j+1 if lower else N):
+            ax[j][i] = fig.add_subplot(grid[j, i],
+                    sharex=ax[i if lower else 0][i],
+                    sharey=ax[j][0])
+            ax[j][i].label_outer()
+    return fig, ax
+
+def _correlation(C):
+    sdev = np.sqrt(np.diag(C))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(np.outer(sdev, sdev) > 0, C / np.outer(sdev, sdev), 0.)
+
+def _heatmap(plt, C, labels):
+    fig, ax = plt.subplots()
+    image = ax.imshow(_correlation(C), cmap='RdBu_r', vmin=-1, vmax=1, interpolation='nearest')
+    fig.colorbar(image, ax=ax, label='correlation')
+    if labels:
+        ax.set_xticks(range(len(labels)), labels, rotation=90)
+        ax.set_yticks(range(len(labels)), labels)
+    return fig, ax
+
+class UncertaintyMatrix(tuple):
+    """ The figure and axes drawn by `uncertainty_matrix`, which can be redrawn for new gvars.
+
+    It unpacks like the pair it is, `fig, ax = uncertainty_matrix(gvs)`,
+    and also keeps the artists of every cell so that `update` can change them in place.
+    """
+
+    def __new__(cls, fig, ax, **state):
+        self = super().__new__(cls, (fig, ax))
+        self.__dict__.update(state)
+        return self
+
+    @property
+    def figure(self):
+        return self[0]
+
+    @property
+    def axes(self):
+        return self[1]
+
+    def update(self, gvs):
+        """ Show new gvars, of the same number and in the same order, reusing the figure and axes.
+
+        Args:
+            gvs:    An array, dictionary or BufferDict of gvars, like those first plotted.
+
+        Returns:
+            A boolean array that is True for the gvars whose means or covariances changed.
+
+        Only the ellipses, lines and spans of cells whose means, variances or covariance changed are moved or reshaped,
+        and only the limits of the rows and columns that moved are reset, unless the widest spread changed.
+        """
+        if self._keys is not None:
+            gvs = [gvs[k] for k in self._keys]
+        gvs = values(gvs)
+        if gvs.data.size != len(self._means):
+            raise ValueError(f"The matrix has {len(self._means)} gvars, not {gvs.data.size}.")
+        with phase('covariance'):
+            C = cached('evalcov', [gvs.data], lambda: gv.evalcov(gvs.data.flatten()))
+        with phase('values'):
+            means = gvs.mean.flatten()
+
+        moved = means != self._means
+        reshaped = C != self._C
+        changed = moved | reshaped.any(axis=0)
+        self._means, self._C = means, C
+        if not changed.any():
+            return changed
+
+        if self._image is not None:
+            self._image.set_data(_correlation(C))
+            self.figure.canvas.draw_idle()
+            return changed
+
+        var = np.diag(C)
+        spread = moved | np.diag(reshaped)
+        # A cell depends on the means and variances of its row and column, and on their covariance.
+        cells = spread[:, np.newaxis] | spread[np.newaxis, :] | reshaped
+        with phase('geometry'):
+            major, minor, angle = _geometry(var[np.newaxis, :], var[:, np.newaxis], C)
+
+        with phase('artists'):
+            for (j, i), e in self._ellipses.items():
+                if cells[j, i]:
+                    e.set_ellipses(means[i:i+1], means[j:j+1], major[j, i:i+1], minor[j, i:i+1], angle[j, i:i+1])
+
+            for (j, i), (horizontal, vertical) in self._lines.items():
+                if moved[j]:
+                    horizontal.set_ydata([means[j], means[j]])
+                if moved[i]:
+                    vertical.set_xdata([means[i], means[i]])
+
+            sdev = np.sqrt(var)
+            for i, (vertical, horizontal) in self._spans.items():
+                if not spread[i]:
+                    continue
+                for s, v, h in zip(self._sigma, vertical, horizontal):
+                    v.set_verts(_corners(means[i:i+1], sdev[i:i+1], s, True))
+                    h.set_verts(_corners(means[i:i+1], sdev[i:i+1], s, False))
+
+            diff = 1.1*max(self._sigma)*np.sqrt(var.max())
+            for i in range(len(means)) if diff != self._diff else np.flatnonzero(moved):
+                self.axes[i][i].set_xlim((means[i]-diff, means[i]+diff))
+                self.axes[i][i].set_ylim((means[i]-diff, means[i]+diff))
+            self._diff = diff
+
+        self.figure.canvas.draw_idle()
+        return changed
+
+@profiled
+def uncertainty_matrix(gvs, labels=None, sigma=[1,2,3], lower=False, max_grid=20, **kwargs):
+    """ Plot the error ellipses of every pair of gvars in a grid.
+
+    Args:
+        gvs:    An array, dictionary or BufferDict of gvars.
+        labels: A list of labels, one for each gvar, or a string to be numbered.
+                Defaults to the keys when `gvs` is a dictionary.
+        sigma:  A list of standard deviations for which to draw ellipses and spans.
+        lower:  If True, only draw the diagonal and the cells below it.
+        max_grid: With more gvars than this, draw their correlation matrix as a single heatmap instead.
+        **kwargs: options accepted by `ellipses`, `axhline`, `axvline`, `vspan` and `hspan`.  The default is color='blue'.
+
+    Returns:
+        An `UncertaintyMatrix`: the figure and an array of axes, which is None where no cell is drawn;
+        or the figure and the heatmap's single axis.
+        Its `update` redraws the figure for new gvars.
+
+    The covariance matrix of `gvs` is computed only once, and every cell is drawn from it.
+    """
 
     if isinstance(gvs, dict) or isinstance(gvs, gv._gvarcore.BufferDict):
         keys = [k for k in gvs]
-        fig, ax = uncertainty_matrix(
+        matrix = uncertainty_matrix(
                 [gvs[k] for k in keys],
                 labels=keys if not labels else labels,
-                sigma=sigma, **kwargs)
-        return fig, ax
+                sigma=sigma, lower=lower, max_grid=max_grid, **kwargs)
+        matrix._keys = keys
+        return matrix
+
+    # pyplot sets up a backend, so only pay for it when a figure is actually made.
+    import matplotlib.pyplot as plt
+
+    gvs = values(gvs)
+    N = gvs.data.size
+    points(N)
+    with phase('covariance'):
+        C = cached('evalcov', [gvs.data], lambda: gv.evalcov(gvs.data.flatten()))
+    with phase('values'):
+        means = gvs.mean.flatten()
 
     if isinstance(labels, str):
-        labels=[f"{labels}{n}" for n in range(len(gvs))]
+        labels=[f"{labels}{n}" for n in range(N)]
 
-    fig, ax = plt.subplots(
-            len(gvs), len(gvs),
-            sharex='col', sharey='row',
-            squeeze=False)
+    state = {'_keys': None, '_sigma': sigma, '_means': means, '_C': C}
+    if N > max_grid:
+        with phase('artists'):
+            fig, ax = _heatmap(plt, C, labels)
+        return UncertaintyMatrix(fig, ax, **state, _image=ax.images[0])
+
+    with phase('artists'):
+        fig, ax = _grid(plt, N, lower)
 
     default = {
             'color': 'blue',
@@ -28,25 +185,42 @@ def uncertainty_matrix(gvs, labels=None, sigma=[1,2,3], **kwargs):
 
     default.update(kwargs)
 
-    max_dev = max([v.sdev for v in gvs])
+    var = np.diag(C)
+    with phase('geometry'):
+        major, minor, angle = _geometry(var[np.newaxis, :], var[:, np.newaxis], C)
+
+    max_dev = np.sqrt(var.max())
     diff = 1.1*max(sigma)*max_dev
 
-    for i,x in enumerate(gvs):
-        for j,y in enumerate(gvs):
-            ellipse(ax[j][i], x, y, sigma=sigma, **default)
-            ax[j][i].axhline(y.mean, linewidth=0.5, **default)
-            ax[j][i].axvline(x.mean, linewidth=0.5, **default)
-            ax[j][i].set_xlim((x.mean-diff, x.mean+diff))
-            ax[j][i].set_ylim((y.mean-diff, y.mean+diff))
-            ax[j][i].set_aspect('equal')
+    # The artists of each cell, kept for `update`.
+    ellipses, lines, spans = {}, {}, {}
 
-            if i==j:
-                vspan(ax[j][i], x, sigma=sigma, **default)
-                hspan(ax[j][i], y, sigma=sigma, **default)
+    with phase('artists'):
+        for i,x in enumerate(gvs.data.flat):
+            for j,y in enumerate(gvs.data.flat):
+                if ax[j][i] is None:
+                    continue
 
-        if labels:
-            ax[0][i].set_title(labels[i])
-            ax[i][0].set_ylabel(labels[i])
-            ax[-1][i].tick_params(axis='x', labelrotation=45)
+                ellipses[j, i] = _draw(ax[j][i], means[i:i+1], means[j:j+1], major[j,i:i+1], minor[j,i:i+1], angle[j,i:i+1],
+                        sigma, **{'alpha': 0.2, **default})
+                lines[j, i] = (ax[j][i].axhline(means[j], linewidth=0.5, **default),
+                        ax[j][i].axvline(means[i], linewidth=0.5, **default))
+                ax[j][i].set_aspect('equal')
 
-    return fig, ax
+                if i==j:
+                    before = len(ax[j][i].collections)
+                    vspan(ax[j][i], x, sigma=sigma, **default)
+                    hspan(ax[j][i], y, sigma=sigma, **default)
+                    added = ax[j][i].collections[before:]
+                    spans[i] = (added[:len(sigma)], added[len(sigma):])
+
+            # The axes are shared along columns and rows, so the limits need only be set once each.
+            ax[i][i].set_xlim((means[i]-diff, means[i]+diff))
+            ax[i][i].set_ylim((means[i]-diff, means[i]+diff))
+
+            if labels:
+                ax[i if lower else 0][i].set_title(labels[i])
+                ax[i][0].set_ylabel(labels[i])
+                ax[-1][i].tick_params(axis='x', labelrotation=45)
+
+    return UncertaintyMatrix(fig, ax, **state, _image=None, _diff=diff, _ellipses=ellipses, _lines=lines, _spans=spans)
@@ -1,5 +1,5 @@
 
-from distutils.core import setup
+from setuptools import setup
 
 
 setup(
@@ -7,9 +7,15 @@ setup(
     description='Utilities for plotting gvars and lsqfits.',
     author='Evan Berkowitz',
     author_email='git@evanberkowitz.com',
+    packages=['gvarplot'],
+    entry_points={
+        'console_scripts': ['gvarplot = gvarplot.cli:main'],
+        },
 
     # pip:
     install_requires=['gvar>=11.9.4'],
+    # Gaussians held as sparse derivatives, as Gaussians.from_gvars makes them, need scipy.
+    extras_require={'sparse': ['scipy']},
     requires=['gvar (>=11.9.4)', 'lsqfit'],
     license='GPLv3+',
     classifiers = [